@@ -0,0 +1,170 @@
+from TrackStreamer import TrackStreamer
+from ResultSink import ResultSink
+from concurrent.futures import Executor, ThreadPoolExecutor
+import pandas as pd
+import asyncio
+import time
+
+class AsyncPipeline:
+    """
+    Finds the entities close to the target with reading, computing and writing the results overlapped.
+
+    Three stages run concurrently, connected by bounded queues:
+    1. Reader: reads the input one chunk at a time on a background thread.
+    2. Compute: finds the hits of every chunk (see TrackStreamer.locate_hits_in_chunk) on an executor,
+       so the vectorized kernels don't block the event loop.
+    3. Sinks: hands the hits of every chunk, in order, to every ResultSink (a file, a socket, an HTTP endpoint...).
+
+    When a stage falls behind, the queue before it fills up and the stages before it wait (backpressure),
+    so at most queue_size chunks (and queue_size hit batches) are held in memory regardless of the size of the input.
+    """
+
+    # Put in a queue after the last item.
+    _END = object()
+
+    def __init__(self, sus_df: pd.DataFrame, distance_from_target = 1000.0, sinks: list[ResultSink] = (),
+                 queue_size: int = 4, executor: Executor = None):
+        """
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param distance_from_target: the maximum distance from the target allowed (in km).
+        :param sinks: the ResultSinks the hits are written to.
+        :param queue_size: the maximum amount of chunks waiting between two stages.
+        :param executor: the executor the hits are computed on (a ProcessPoolExecutor can be used as well),
+                         a single background thread if not given.
+        """
+
+        # Catching a case where the size of the queues is incorrect.
+        if queue_size <= 0: queue_size = 4
+
+        self.sus_df = sus_df
+        self.distance_from_target = distance_from_target
+        self.sinks = list(sinks)
+        self.queue_size = queue_size
+        self.executor = executor
+
+        # Statistics of the latest run.
+        self.stats = {}
+
+    @staticmethod
+    def _chunks_of(source, chunk_size: int, parse_ts: bool):
+        """
+        :param source: the path of a track file (.csv or .parquet), a DataFrame, or an iterable of DataFrames.
+        :param chunk_size: the maximum amount of rows per chunk (for a file or a DataFrame).
+        :param parse_ts: True if the timestamps should be parsed as dates (useful for CSV files).
+        :return: an iterator of chunks (with the ids as strings, like TrackStreamer.read_chunks).
+        """
+
+        if isinstance(source, str): return TrackStreamer.read_chunks(source, chunk_size, parse_ts)
+
+        chunks = source
+
+        if isinstance(source, pd.DataFrame):
+            chunks = (source.iloc[start:start + chunk_size] for start in range(0, len(source), chunk_size))
+
+        return (chunk.astype({"id": str}) for chunk in chunks)
+
+    async def _read(self, chunks, chunks_queue: asyncio.Queue, read_executor: Executor):
+        """
+        Reads the chunks on a background thread and puts them in the queue.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            chunk = await loop.run_in_executor(read_executor, next, chunks, AsyncPipeline._END)
+
+            if chunk is AsyncPipeline._END: break
+
+            self.stats["chunks"] += 1
+            self.stats["rows"] += len(chunk)
+            await chunks_queue.put(chunk)
+
+        await chunks_queue.put(AsyncPipeline._END)
+
+    async def _compute(self, chunks_queue: asyncio.Queue, hits_queue: asyncio.Queue, compute_executor: Executor):
+        """
+        Finds the hits of every chunk on the executor, and puts the hits of the chunks that have any in the queue.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while (chunk := await chunks_queue.get()) is not AsyncPipeline._END:
+            hits = await loop.run_in_executor(compute_executor, TrackStreamer.locate_hits_in_chunk,
+                                              chunk, self.sus_df, self.distance_from_target)
+
+            if not hits.empty: await hits_queue.put(hits)
+
+        await hits_queue.put(AsyncPipeline._END)
+
+    async def _write(self, hits_queue: asyncio.Queue):
+        """
+        Writes the hits to all the sinks.
+        """
+
+        while (hits := await hits_queue.get()) is not AsyncPipeline._END:
+            self.stats["hits"] += len(hits)
+
+            for sink in self.sinks: await sink.write(hits)
+
+    async def run(self, source, chunk_size: int = 1_000_000, parse_ts: bool = False) -> dict:
+        """
+        Runs the pipeline over the whole input.
+
+        :param source: the path of a track file (.csv or .parquet, ordered by timestamp), a DataFrame,
+                       or an iterable of DataFrames (chunks).
+        :param chunk_size: the maximum amount of rows per chunk (for a file or a DataFrame).
+        :param parse_ts: True if the timestamps should be parsed as dates (useful for CSV files).
+        :return: the statistics of the run: the amount of chunks, rows and hits, and the seconds it took.
+        """
+
+        self.stats = {"chunks": 0, "rows": 0, "hits": 0, "seconds": 0.0}
+
+        # Checking if distance is valid.
+        if self.distance_from_target <= 0:
+            print("Max distance can't be smaller or equal to 0!")
+            return self.stats
+
+        start = time.perf_counter()
+
+        chunks_queue = asyncio.Queue(maxsize=self.queue_size)
+        hits_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        # The reader gets its own thread, so reading the next chunk overlaps computing the current one.
+        read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-reader")
+        compute_executor = self.executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-compute")
+
+        opened_sinks = []
+
+        try:
+            for sink in self.sinks:
+                await sink.open()
+                opened_sinks.append(sink)
+
+            tasks = [asyncio.create_task(self._read(AsyncPipeline._chunks_of(source, chunk_size, parse_ts),
+                                                    chunks_queue, read_executor)),
+                     asyncio.create_task(self._compute(chunks_queue, hits_queue, compute_executor)),
+                     asyncio.create_task(self._write(hits_queue))]
+
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # A failing stage stops the other stages (which might be waiting on a queue forever).
+                for task in tasks: task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        finally:
+            for sink in opened_sinks: await sink.close()
+
+            read_executor.shutdown(wait=False, cancel_futures=True)
+            if self.executor is None: compute_executor.shutdown(wait=False, cancel_futures=True)
+
+        self.stats["seconds"] = time.perf_counter() - start
+
+        return self.stats
+
+    def run_sync(self, source, chunk_size: int = 1_000_000, parse_ts: bool = False) -> dict:
+        """
+        Runs the pipeline from synchronous code (see run).
+        """
+
+        return asyncio.run(self.run(source, chunk_size, parse_ts))
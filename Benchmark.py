@@ -0,0 +1,184 @@
+from EntitiesGenerator import EntitiesGenerator
+from RangedEntitiesFinder import RangedEntitiesFinder
+from SpatialIndex import SpatialIndex
+from DistanceSweep import DistanceSweep
+from TrackStore import TrackStore
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import contextlib
+import itertools
+import platform
+import resource
+import argparse
+import json
+import time
+import os
+
+class Benchmark:
+    """
+    Measures the performance of RangedEntitiesFinder and EntitiesGenerator over a grid of
+    entity counts, track counts, hit densities (the chance of an entity to come close to the target),
+    thresholds and finder engines.
+
+    Every case runs in a fresh process, so its peak memory (RSS) is not affected by the previous cases.
+    The results are written as a JSON report that can be compared run over run.
+    """
+
+    ENGINES = ("scan", "store", "index", "sweep", "parallel")
+
+    @staticmethod
+    def _peak_rss_mb() -> float:
+        """
+        :return: the peak resident memory of the current process, in MB.
+        """
+
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # ru_maxrss is in bytes on macOS and in KB everywhere else.
+        return peak_rss / (1024 ** 2 if platform.system() == "Darwin" else 1024)
+
+    @staticmethod
+    def _run_finder_case(case: dict) -> dict:
+        """
+        Runs a single finder case: generates the data, then locates the entities close to the target.
+
+        :param case: the parameters of the case (num_entities, num_tracks, proximity_chance, threshold, engine, seed).
+        :return: the case with its measurements added.
+        """
+
+        start = time.perf_counter()
+        (total_df, sus_df) = EntitiesGenerator.generate_entities_paths_batch(
+            case["num_entities"], case["num_tracks"], case["seed"], case["proximity_chance"])
+        generate_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+
+        # The "store" engine is the scan over a TrackStore that is built once (like an index).
+        if case["engine"] == "store":
+            total_df = TrackStore(total_df)
+
+        if case["engine"] == "index":
+            index = SpatialIndex(total_df)
+        elif case["engine"] == "sweep":
+            index = DistanceSweep(total_df, sus_df)
+        else:
+            index = None
+
+        build_time = time.perf_counter() - start
+        workers = None if case["engine"] == "parallel" else 1
+
+        start = time.perf_counter()
+        result = RangedEntitiesFinder.locate_closest_entities_to_target(total_df, sus_df, case["threshold"],
+                                                                        index, workers=workers)
+        query_time = time.perf_counter() - start
+
+        rows = len(total_df)
+
+        return dict(case, rows=rows, hits=len(result), filter_stats=result.attrs.get("filter_stats"),
+                    generate_seconds=generate_time, build_seconds=build_time, query_seconds=query_time,
+                    rows_per_second=rows / (build_time + query_time) if build_time + query_time > 0 else None,
+                    peak_rss_mb=Benchmark._peak_rss_mb())
+
+    @staticmethod
+    def _run_generator_case(case: dict) -> dict:
+        """
+        Runs a single generator case.
+
+        :param case: the parameters of the case (generator, num_entities, num_tracks, seed).
+        :return: the case with its measurements added.
+        """
+
+        start = time.perf_counter()
+
+        if case["generator"] == "batch":
+            (total_df, _) = EntitiesGenerator.generate_entities_paths_batch(case["num_entities"], case["num_tracks"],
+                                                                          case["seed"])
+        else:
+            # The original generator prints every path it generates.
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                (total_df, _) = EntitiesGenerator.generate_entities_paths(case["num_entities"], case["num_tracks"])
+
+        seconds = time.perf_counter() - start
+
+        return dict(case, rows=len(total_df), seconds=seconds,
+                    rows_per_second=len(total_df) / seconds if seconds > 0 else None,
+                    peak_rss_mb=Benchmark._peak_rss_mb())
+
+    @staticmethod
+    def _run_isolated(function, case: dict) -> dict:
+        """
+        Runs a case in a new process.
+
+        :param function: the function that runs the case.
+        :param case: the parameters of the case.
+        :return: the result of the function, or the case with the error if it failed.
+        """
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                return executor.submit(function, case).result()
+            except Exception as ex:
+                return dict(case, error=repr(ex))
+
+    @staticmethod
+    def run(entity_counts: list, track_counts: list, proximity_chances: list, thresholds: list,
+            engines: list = ("scan",), seed: int = 0, legacy_max_rows: int = 10_000) -> dict:
+        """
+        Runs the whole grid of cases.
+
+        :param entity_counts: the numbers of entities to generate.
+        :param track_counts: the numbers of tracks per entity to generate.
+        :param proximity_chances: the chances of an entity to come close to the target (hit densities).
+        :param thresholds: the distances from the target to search (in km).
+        :param engines: the finder engines to measure ("scan", "store", "index", "sweep", "parallel").
+        :param seed: the seed of the generated data.
+        :param legacy_max_rows: the original generator is only measured up to this amount of rows (it's quadratic).
+        :return: the report (run metadata and the results of every case).
+        """
+
+        finder_results = []
+        generator_results = []
+
+        for num_entities, num_tracks in itertools.product(entity_counts, track_counts):
+            for generator in ("batch", "legacy"):
+                if generator == "legacy" and num_entities * num_tracks > legacy_max_rows: continue
+
+                case = {"generator": generator, "num_entities": num_entities, "num_tracks": num_tracks, "seed": seed}
+                generator_results.append(Benchmark._run_isolated(Benchmark._run_generator_case, case))
+                print("generator", generator_results[-1])
+
+            for proximity_chance, threshold, engine in itertools.product(proximity_chances, thresholds, engines):
+                case = {"num_entities": num_entities, "num_tracks": num_tracks, "proximity_chance": proximity_chance,
+                        "threshold": threshold, "engine": engine, "seed": seed}
+                finder_results.append(Benchmark._run_isolated(Benchmark._run_finder_case, case))
+                print("finder", finder_results[-1])
+
+        return {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "generator": generator_results,
+            "finder": finder_results
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the finder and the generator over a grid of sizes.")
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--proximity", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[100.0, 1000.0])
+    parser.add_argument("--engines", nargs="+", choices=Benchmark.ENGINES, default=["scan"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy-max-rows", type=int, default=10_000)
+    parser.add_argument("--output", default="benchmark_report.json", help="the path of the JSON report")
+    args = parser.parse_args()
+
+    report = Benchmark.run(args.entities, args.tracks, args.proximity, args.thresholds,
+                           args.engines, args.seed, args.legacy_max_rows)
+
+    with open(args.output, "w") as report_file:
+        json.dump(report, report_file, indent=2, default=str)
+
+    print(f"Report written to {args.output}")
@@ -0,0 +1,202 @@
+from DistanceEngine import DistanceEngine
+from RangedEntitiesFinder import RangedEntitiesFinder
+import numpy as np
+import pandas as pd
+
+class CpaEngine:
+    """
+    Finds the closest point of approach (CPA) between the target and every other entity.
+
+    Checking only the sampled points misses entities that pass close to the target between two samples.
+    Instead, the paths are treated as piecewise linear (in latitude, longitude and height) between consecutive
+    samples, like the paths EntitiesGenerator produces, and for every segment the minimum separation and the time
+    it occurs are calculated numerically (see _calc_segments_cpa), for all the segments of all the entities at once.
+    """
+
+    # Columns of the DataFrame returned by locate_closest_approaches.
+    RESULT_COLUMNS = ["id", "cpa_ts", "distance", "lat", "long", "height",
+                      "target_lat", "target_long", "target_height"]
+
+    # The amount of evenly spaced fractions every segment is checked at before the refinement.
+    GRID_SIZE = 9
+    # The amount of golden-section steps of the refinement, each one shrinks the bracket by about 0.618.
+    REFINE_STEPS = 40
+
+    @staticmethod
+    def _calc_distances_at(entity_start: np.ndarray, entity_end: np.ndarray,
+                           target_start: np.ndarray, target_end: np.ndarray, fraction) -> np.ndarray:
+        """
+        Calculates the distances between the entities and the target at a fraction of their segments,
+        with both located by DistanceEngine.interpolate_points (like the paths EntitiesGenerator produces).
+
+        :param fraction: the fraction of the segments, a number or an array of shape (n,).
+        :return: the distances (in km), array of shape (n,).
+        """
+
+        return DistanceEngine.calc_distances(DistanceEngine.interpolate_points(target_start, target_end, fraction),
+                                             DistanceEngine.interpolate_points(entity_start, entity_end, fraction))
+
+    @staticmethod
+    def _calc_segments_cpa(entity_start: np.ndarray, entity_end: np.ndarray,
+                           target_start: np.ndarray, target_end: np.ndarray) -> tuple:
+        """
+        Calculates the closest point of approach of pairs of segments that are traveled during the same time.
+
+        The locations along a segment are interpolated linearly in latitude, longitude and height,
+        so the separation isn't a simple function of the fraction of the segment. It's minimized in three steps,
+        for all the segments at once:
+        1. A first guess: the relative motion is approximated as linear in ECEF coordinates,
+           where the closest fraction is the minimum of a quadratic.
+        2. The guess, both ends and GRID_SIZE evenly spaced fractions are evaluated exactly,
+           and the best of them brackets the minimum (one grid step on each side).
+        3. The bracket is refined with golden-section search on the exact distances.
+
+        :param entity_start: the locations of the entities at the start of the segments, array of shape (n, 3).
+        :param entity_end: the locations of the entities at the end of the segments, array of shape (n, 3).
+        :param target_start: the locations of the target at the start of the segments, array of shape (n, 3).
+        :param target_end: the locations of the target at the end of the segments, array of shape (n, 3).
+        :return: a tuple of the fractions of the segments at which the CPA occurs, and the distances at the CPA.
+        """
+
+        segments = (entity_start, entity_end, target_start, target_end)
+
+        relative_start = DistanceEngine.to_ecef(entity_start) - DistanceEngine.to_ecef(target_start)
+        relative_end = DistanceEngine.to_ecef(entity_end) - DistanceEngine.to_ecef(target_end)
+        relative_velocity = relative_end - relative_start
+
+        # Minimizing |relative_start + fraction * relative_velocity| over fraction in [0, 1].
+        speed_sq = np.einsum("ij,ij->i", relative_velocity, relative_velocity)
+        guess = np.divide(-np.einsum("ij,ij->i", relative_start, relative_velocity), speed_sq,
+                          out=np.zeros_like(speed_sq), where=speed_sq > 0)
+        guess = np.clip(guess, 0, 1)
+
+        grid = np.linspace(0, 1, CpaEngine.GRID_SIZE)
+        candidates_fractions = np.column_stack([guess] + [np.full_like(guess, grid_fraction) for grid_fraction in grid])
+        candidates_distances = np.column_stack([CpaEngine._calc_distances_at(*segments, current_fraction)
+                                                for current_fraction in candidates_fractions.T])
+
+        best = np.argmin(candidates_distances, axis=1)
+        rows = np.arange(len(best))
+        best_fractions = candidates_fractions[rows, best]
+        best_distances = candidates_distances[rows, best]
+
+        # Golden-section search over the bracket around the best candidate.
+        inv_phi = (np.sqrt(5) - 1) / 2
+        low = np.clip(best_fractions - grid[1], 0, 1)
+        high = np.clip(best_fractions + grid[1], 0, 1)
+        inner_low = high - inv_phi * (high - low)
+        inner_high = low + inv_phi * (high - low)
+        inner_low_distances = CpaEngine._calc_distances_at(*segments, inner_low)
+        inner_high_distances = CpaEngine._calc_distances_at(*segments, inner_high)
+
+        for _ in range(CpaEngine.REFINE_STEPS):
+            # Keeping the part of the bracket around the smaller of the two inner points.
+            keep_low = inner_low_distances < inner_high_distances
+
+            low = np.where(keep_low, low, inner_low)
+            high = np.where(keep_low, inner_high, high)
+
+            new_fractions = np.where(keep_low, high - inv_phi * (high - low), low + inv_phi * (high - low))
+            new_distances = CpaEngine._calc_distances_at(*segments, new_fractions)
+
+            inner_low, inner_high = (np.where(keep_low, new_fractions, inner_high),
+                                     np.where(keep_low, inner_low, new_fractions))
+            inner_low_distances, inner_high_distances = (np.where(keep_low, new_distances, inner_high_distances),
+                                                         np.where(keep_low, inner_low_distances, new_distances))
+
+        refined_fractions = (low + high) / 2
+        refined_distances = CpaEngine._calc_distances_at(*segments, refined_fractions)
+
+        # The refinement never replaces a candidate that's closer.
+        refined = refined_distances < best_distances
+
+        return (np.where(refined, refined_fractions, best_fractions),
+                np.where(refined, refined_distances, best_distances))
+
+    @staticmethod
+    def locate_closest_approaches(total_df: pd.DataFrame, sus_df: pd.DataFrame,
+                                  distance_from_target: float = None) -> pd.DataFrame:
+        """
+        Locates the closest point of approach between the **sus**picious target and every other entity.
+        The distance is measured in km.
+
+        A segment is formed by two consecutive samples of the target and the samples of the entity
+        at the same two timestamps.
+
+        :param total_df: DataFrame that contains data about the path of entities including a target.
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param distance_from_target: if given, only the entities whose CPA is closer than it are returned.
+        :return: DataFrame (see RESULT_COLUMNS) with one row per entity, the time of its CPA, the distance
+                 and the locations of both the entity and the target at that time. Sorted by distance.
+                 None if the input is invalid.
+        """
+
+        # Checking if distance is valid.
+        if distance_from_target is not None and distance_from_target <= 0:
+            print("Max distance can't be smaller or equal to 0!")
+            return None
+
+        # The path of the target, sorted by time (one sample per timestamp).
+        sus_path = sus_df.drop_duplicates(subset="ts").sort_values(by="ts", kind="stable")
+        sus_points = sus_path[["lat", "long", "height"]].to_numpy(dtype=float)
+        sus_times = RangedEntitiesFinder._ts_to_numbers(sus_path["ts"])
+
+        # Matching every entity sample with the sample of the target at the same timestamp.
+        non_target_entities = total_df[~total_df["id"].isin(sus_df["id"])]
+        target_idx = pd.Index(sus_path["ts"]).get_indexer(non_target_entities["ts"])
+        entities = non_target_entities[target_idx >= 0].assign(target_idx=target_idx[target_idx >= 0])
+
+        # Ordering the samples of each entity by time, so consecutive rows form the segments.
+        entities = entities.sort_values(by=["id", "target_idx"], kind="stable")
+        ids = entities["id"].to_numpy()
+        target_idx = entities["target_idx"].to_numpy()
+        entity_points = entities[["lat", "long", "height"]].to_numpy(dtype=float)
+
+        # A segment starts at every sample that is followed by a sample of the same entity
+        # at the next timestamp of the target.
+        segment_starts = np.flatnonzero((ids[1:] == ids[:-1]) & (target_idx[1:] == target_idx[:-1] + 1))
+        segment_ends = segment_starts + 1
+
+        if len(segment_starts) == 0: return pd.DataFrame(columns=CpaEngine.RESULT_COLUMNS)
+
+        start_idx = target_idx[segment_starts]
+        end_idx = target_idx[segment_ends]
+
+        fractions, distances = CpaEngine._calc_segments_cpa(entity_points[segment_starts], entity_points[segment_ends],
+                                                            sus_points[start_idx], sus_points[end_idx])
+
+        segments = pd.DataFrame({"id": ids[segment_starts], "distance": distances,
+                                 "segment": np.arange(len(segment_starts))})
+
+        # Keeping the closest segment of every entity.
+        closest = segments.loc[segments.groupby(by="id", sort=False)["distance"].idxmin()]
+        closest_segments = closest["segment"].to_numpy()
+
+        fractions = fractions[closest_segments]
+        start_idx = start_idx[closest_segments]
+        end_idx = end_idx[closest_segments]
+
+        cpa_times = sus_times[start_idx] + fractions * (sus_times[end_idx] - sus_times[start_idx])
+
+        if pd.api.types.is_datetime64_any_dtype(sus_path["ts"]):
+            cpa_times = pd.to_datetime(cpa_times.astype(np.int64))
+
+        entity_locations = DistanceEngine.interpolate_points(entity_points[segment_starts[closest_segments]],
+                                                             entity_points[segment_ends[closest_segments]], fractions)
+        target_locations = DistanceEngine.interpolate_points(sus_points[start_idx], sus_points[end_idx], fractions)
+
+        result = pd.DataFrame({
+            "id": closest["id"].to_numpy(),
+            "cpa_ts": cpa_times,
+            "distance": closest["distance"].to_numpy(),
+            "lat": entity_locations[:, 0],
+            "long": entity_locations[:, 1],
+            "height": entity_locations[:, 2],
+            "target_lat": target_locations[:, 0],
+            "target_long": target_locations[:, 1],
+            "target_height": target_locations[:, 2]
+        })
+
+        if distance_from_target is not None: result = result[result["distance"] < distance_from_target]
+
+        return result.sort_values(by="distance", kind="stable").reset_index(drop=True)
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import argparse
+import os
+
+class DataLoader:
+    """
+    Loads the "total" and "sus" tables from Excel or from fast columnar formats
+    (Parquet, Feather/Arrow IPC, or a directory of memory-mapped .npy column files),
+    and converts the Excel file to those formats once.
+
+    Layout of the columnar formats (per directory):
+        <dir>/total.parquet, <dir>/sus.parquet
+        <dir>/total.feather, <dir>/sus.feather
+        <dir>/total/<column>.npy, <dir>/sus/<column>.npy
+    """
+
+    TABLE_NAMES = ("total", "sus")
+    COLUMNS = ["id", "ts", "lat", "long", "height"]
+    FORMATS = ("parquet", "feather", "npy")
+
+    @staticmethod
+    def _load_npy_columns(table_dir: str) -> pd.DataFrame:
+        """
+        Loads a table stored as one .npy file per column.
+        The files are memory-mapped, so only the pages that are actually used are read from the disk.
+
+        :param table_dir: the directory of the column files.
+        :return: DataFrame backed by the memory-mapped columns.
+        """
+
+        columns = {column: np.load(os.path.join(table_dir, column + ".npy"), mmap_mode="r")
+                   for column in DataLoader.COLUMNS}
+
+        # copy=False keeps the columns as (read only) views of the memory-mapped files.
+        return pd.DataFrame(columns, copy=False)
+
+    @staticmethod
+    def _save_npy_columns(df: pd.DataFrame, table_dir: str):
+        """
+        Saves a table as one .npy file per column.
+
+        :param df: the table to save.
+        :param table_dir: the directory to save the column files in.
+        """
+
+        os.makedirs(table_dir, exist_ok=True)
+
+        for column in DataLoader.COLUMNS:
+            values = df[column].to_numpy()
+
+            # Object columns (such as the ids) are stored as fixed width strings, which can be memory-mapped.
+            if values.dtype == object: values = values.astype(str)
+
+            np.save(os.path.join(table_dir, column + ".npy"), values)
+
+    @staticmethod
+    def load_table(data_path: str, table_name: str) -> pd.DataFrame:
+        """
+        Loads a single table.
+
+        :param data_path: an Excel file (.xlsx), or a directory that contains the table in a columnar format.
+        :param table_name: the name of the table ("total" or "sus").
+        :return: DataFrame that contains the table, with the ids as strings.
+        """
+
+        if os.path.isfile(data_path):
+            if os.path.splitext(data_path)[1].lower() not in (".xlsx", ".xls"):
+                raise ValueError(f"Unsupported data file: '{data_path}' (expected an Excel file or a directory).")
+
+            return pd.read_excel(data_path, table_name, converters={"id": str})
+
+        table_path = os.path.join(data_path, table_name)
+
+        if os.path.isfile(table_path + ".parquet"):
+            table = pd.read_parquet(table_path + ".parquet")
+        elif os.path.isfile(table_path + ".feather"):
+            table = pd.read_feather(table_path + ".feather")
+        elif os.path.isdir(table_path):
+            table = DataLoader._load_npy_columns(table_path)
+        else:
+            raise FileNotFoundError(f"Table '{table_name}' was not found in '{data_path}'.")
+
+        # Only the ids are copied, the other columns of the .npy format stay memory-mapped.
+        table["id"] = table["id"].astype(str)
+
+        return table
+
+    @staticmethod
+    def load_tables(data_path: str) -> tuple:
+        """
+        Loads the "total" and "sus" tables.
+
+        :param data_path: an Excel file (.xlsx), or a directory that contains the tables in a columnar format.
+        :return: a tuple that contains the path of all entities (including target), and separately the path of the target.
+        """
+
+        return (DataLoader.load_table(data_path, "total"), DataLoader.load_table(data_path, "sus"))
+
+    @staticmethod
+    def save_tables(total_df: pd.DataFrame, sus_df: pd.DataFrame, out_dir: str, data_format: str = "parquet"):
+        """
+        Saves the "total" and "sus" tables in a columnar format.
+
+        :param total_df: DataFrame that contains data about the path of entities including a target.
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param out_dir: the directory to save the tables in.
+        :param data_format: "parquet", "feather" or "npy".
+        """
+
+        if data_format not in DataLoader.FORMATS:
+            raise ValueError(f"Unsupported format: '{data_format}' (expected one of {DataLoader.FORMATS}).")
+
+        os.makedirs(out_dir, exist_ok=True)
+
+        for table_name, table in zip(DataLoader.TABLE_NAMES, (total_df, sus_df)):
+            table = table[DataLoader.COLUMNS].reset_index(drop=True)
+            table_path = os.path.join(out_dir, table_name)
+
+            if data_format == "parquet":
+                table.to_parquet(table_path + ".parquet", index=False)
+            elif data_format == "feather":
+                table.to_feather(table_path + ".feather")
+            else:
+                DataLoader._save_npy_columns(table, table_path)
+
+    @staticmethod
+    def convert_excel(xlsx_path: str, out_dir: str, data_format: str = "parquet"):
+        """
+        Converts the tables of an Excel file to a columnar format (one time), so later runs don't parse the Excel file.
+
+        :param xlsx_path: the path of the Excel file.
+        :param out_dir: the directory to save the tables in.
+        :param data_format: "parquet", "feather" or "npy".
+        """
+
+        (total_df, sus_df) = DataLoader.load_tables(xlsx_path)
+        DataLoader.save_tables(total_df, sus_df, out_dir, data_format)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts the Excel data tables to a columnar format.")
+    parser.add_argument("xlsx_path", help="the Excel file to convert")
+    parser.add_argument("out_dir", help="the directory to save the converted tables in")
+    parser.add_argument("--format", dest="data_format", choices=DataLoader.FORMATS, default="parquet")
+    args = parser.parse_args()
+
+    DataLoader.convert_excel(args.xlsx_path, args.out_dir, args.data_format)
@@ -0,0 +1,329 @@
+from geopy import distance as gpy_distance
+import numpy as np
+
+class DistanceEngine:
+    """
+    Calculates the distances between many pairs of points at once.
+
+    Uses the same distance definition as RangedEntitiesFinder._calc_distance
+    (geodesic distance on the WGS-84 ellipsoid combined with the height difference
+    using pythagoras theorem), but evaluates it for whole NumPy arrays in a single pass
+    using Vincenty's inverse formula instead of one geopy call per pair.
+
+    Accuracy: Vincenty's formula is accurate to about 0.5 mm on the WGS-84 ellipsoid,
+    compared against geopy's geodesic the difference is below 1e-6 km.
+    The few nearly antipodal pairs for which Vincenty's formula does not converge
+    are calculated with geopy instead.
+    """
+
+    # WGS-84 ellipsoid parameters (in km), the same ellipsoid geopy uses by default.
+    WGS84_A = 6378.137
+    WGS84_F = 1 / 298.257223563
+    WGS84_B = WGS84_A * (1 - WGS84_F)
+
+    @staticmethod
+    def _to_points_array(points) -> np.ndarray:
+        """
+        Converts the given points to a NumPy array of shape (n, 3).
+
+        :param points: a single point or a sequence of points (latitude, longitude, height).
+        :return: a float64 array of shape (n, 3).
+        """
+
+        points_array = np.asarray(points, dtype=np.float64)
+
+        # A single point is treated as an array that contains one point.
+        if points_array.ndim == 1: points_array = points_array.reshape(1, 3)
+
+        return points_array
+
+    @staticmethod
+    def to_ecef(points) -> np.ndarray:
+        """
+        Converts points (latitude, longitude, height) to Earth-centered, Earth-fixed (ECEF)
+        cartesian coordinates on the WGS-84 ellipsoid. All the values are in km.
+
+        :param points: a single point or a sequence of points (latitude, longitude, height).
+        :return: a float64 array of shape (n, 3) of the x, y, z coordinates.
+        """
+
+        points = DistanceEngine._to_points_array(points)
+
+        lat = np.radians(points[:, 0])
+        long = np.radians(points[:, 1])
+        height = points[:, 2]
+
+        e_sq = DistanceEngine.WGS84_F * (2 - DistanceEngine.WGS84_F)
+        # Prime vertical radius of curvature.
+        n = DistanceEngine.WGS84_A / np.sqrt(1 - e_sq * np.sin(lat) ** 2)
+
+        return np.column_stack(((n + height) * np.cos(lat) * np.cos(long),
+                                (n + height) * np.cos(lat) * np.sin(long),
+                                (n * (1 - e_sq) + height) * np.sin(lat)))
+
+    @staticmethod
+    def interpolate_points(points_a, points_b, fraction) -> np.ndarray:
+        """
+        Interpolates linearly between pairs of points (latitude, longitude, height).
+        The longitude is interpolated along the short way around (across the antimeridian if needed).
+
+        :param points_a: the points at fraction 0, array-like of shape (n, 3).
+        :param points_b: the points at fraction 1, array-like of shape (n, 3).
+        :param fraction: the fraction of the way from points_a to points_b, a number or an array of shape (n,).
+        :return: the interpolated points, array of shape (n, 3).
+        """
+
+        points_a = DistanceEngine._to_points_array(points_a)
+        points_b = DistanceEngine._to_points_array(points_b)
+        fraction = np.asarray(fraction, dtype=np.float64).reshape(-1, 1)
+
+        delta = points_b - points_a
+        delta[:, 1] = (delta[:, 1] + 180) % 360 - 180
+
+        interpolated = points_a + fraction * delta
+        interpolated[:, 1] = (interpolated[:, 1] + 180) % 360 - 180
+
+        return interpolated
+
+    @staticmethod
+    def max_chord_factor(max_height: float) -> float:
+        """
+        Calculates a factor k for which the straight line (ECEF) distance between two points
+        is never larger than k times their distance as calculated by calc_distances,
+        as long as both points are at most max_height km above the surface.
+
+        Used for turning a distance from a target into a safe search radius in ECEF coordinates.
+
+        :param max_height: the maximum height (in km) of the points.
+        :return: the factor (always at least 1).
+        """
+
+        # The smallest radius of curvature of the WGS-84 ellipsoid (meridional radius at the equator).
+        min_curvature_radius = DistanceEngine.WGS84_A * (1 - DistanceEngine.WGS84_F) ** 2
+
+        # A tiny margin is added to cover floating point rounding.
+        return (1 + max(max_height, 0.0) / min_curvature_radius) * (1 + 1e-9)
+
+    # Names of the counters returned by prefilter and calc_distances_within.
+    FILTER_STATS = ("pairs", "height_pruned", "box_pruned", "evaluated", "within_range")
+
+    @staticmethod
+    def prefilter(points_a, points_b, max_distance: float) -> tuple:
+        """
+        Rejects the pairs of points that are certainly not closer than max_distance, using cheap vectorized
+        comparisons only (no geodesic per pair). The check is conservative: a pair that is rejected is never
+        within range, the pairs that pass still need their exact distance calculated.
+
+        Two stages are applied one after the other:
+        1. Height: the distance is never smaller than the height difference.
+        2. Bounding box: a geodesic shorter than max_distance can't change the latitude by more than
+           max_distance over the smallest meridional radius of curvature, nor the longitude by more than
+           max_distance over the smallest parallel radius along the way (in degrees).
+           The longitude isn't checked for boxes that reach a pole.
+
+        :param points_a: the first points, array-like of shape (n, 3) or (3,).
+        :param points_b: the second points, array-like of shape (n, 3) or (3,).
+        :param max_distance: the distance (in km) from which pairs are out of range.
+        :return: a tuple of a boolean array of the pairs that passed, and a dictionary of the amount of pairs
+                 checked ("pairs") and rejected by each stage ("height_pruned", "box_pruned").
+        """
+
+        points_a = DistanceEngine._to_points_array(points_a)
+        points_b = DistanceEngine._to_points_array(points_b)
+        points_a, points_b = np.broadcast_arrays(points_a, points_b)
+
+        # Same validation as calc_horizontal_distances, so invalid points aren't silently filtered out.
+        if np.any(np.abs(points_a[:, 0]) > 90) or np.any(np.abs(points_b[:, 0]) > 90):
+            raise ValueError("Latitude must be in the [-90; 90] range.")
+
+        # Stage 1: the height difference alone is already out of range.
+        candidates = np.abs(points_b[:, 2] - points_a[:, 2]) < max_distance
+        height_passed = int(candidates.sum())
+
+        # Stage 2: the latitude and longitude bounding box.
+        # The smallest meridional radius of curvature (at the equator), with a tiny margin for rounding.
+        min_meridional_radius = DistanceEngine.WGS84_A * (1 - DistanceEngine.WGS84_F) ** 2
+        max_lat_diff = np.degrees(max_distance / min_meridional_radius) * (1 + 1e-9)
+
+        lat_diff = np.abs(points_b[:, 0] - points_a[:, 0])
+        candidates &= lat_diff < max_lat_diff
+
+        # The geodesic stays within max_lat_diff of the latitude of the first point, where the radius
+        # of the parallel is at least WGS84_A * cos(latitude).
+        max_abs_lat = np.abs(points_a[:, 0]) + max_lat_diff
+        reaches_pole = max_abs_lat >= 90
+
+        with np.errstate(divide="ignore"):
+            min_parallel_radius = DistanceEngine.WGS84_A * np.cos(np.radians(np.minimum(max_abs_lat, 90)))
+            max_long_diff = np.degrees(max_distance / min_parallel_radius) * (1 + 1e-9)
+
+        long_diff = np.abs((points_b[:, 1] - points_a[:, 1] + 180) % 360 - 180)
+        candidates &= reaches_pole | (long_diff < max_long_diff)
+
+        stats = {"pairs": len(candidates),
+                 "height_pruned": len(candidates) - height_passed,
+                 "box_pruned": height_passed - int(candidates.sum())}
+
+        return candidates, stats
+
+    @staticmethod
+    def calc_horizontal_distances(lat_a: np.ndarray, long_a: np.ndarray,
+                                  lat_b: np.ndarray, long_b: np.ndarray,
+                                  max_iterations: int = 200, tolerance: float = 1e-12) -> np.ndarray:
+        """
+        Calculates the geodesic distances (in km) between pairs of latitude and longitude coordinates.
+        All the arrays must be of the same shape (or broadcastable to the same shape).
+
+        :param lat_a: latitudes of the first points [deg].
+        :param long_a: longitudes of the first points [deg].
+        :param lat_b: latitudes of the second points [deg].
+        :param long_b: longitudes of the second points [deg].
+        :param max_iterations: the maximum amount of iterations of Vincenty's formula.
+        :param tolerance: the change in lambda (in radians) at which the iterations stop.
+        :return: an array of the distances between each pair of points.
+        """
+
+        lat_a, long_a, lat_b, long_b = np.broadcast_arrays(*(np.asarray(values, dtype=np.float64)
+                                                             for values in (lat_a, long_a, lat_b, long_b)))
+
+        # Same validation geopy does for every single point.
+        if np.any(np.abs(lat_a) > 90) or np.any(np.abs(lat_b) > 90):
+            raise ValueError("Latitude must be in the [-90; 90] range.")
+
+        a = DistanceEngine.WGS84_A
+        b = DistanceEngine.WGS84_B
+        f = DistanceEngine.WGS84_F
+
+        # Difference in longitude, normalized to [-pi, pi].
+        long_diff = np.radians(long_b - long_a)
+        long_diff = (long_diff + np.pi) % (2 * np.pi) - np.pi
+
+        # Reduced latitudes (latitudes on the auxiliary sphere).
+        reduced_lat_a = np.arctan((1 - f) * np.tan(np.radians(lat_a)))
+        reduced_lat_b = np.arctan((1 - f) * np.tan(np.radians(lat_b)))
+        sin_u_a, cos_u_a = np.sin(reduced_lat_a), np.cos(reduced_lat_a)
+        sin_u_b, cos_u_b = np.sin(reduced_lat_b), np.cos(reduced_lat_b)
+
+        lambda_ = long_diff.copy()
+        sin_sigma = np.zeros(long_diff.shape)
+        cos_sigma = np.ones(long_diff.shape)
+        sigma = np.zeros(long_diff.shape)
+        cos_sq_alpha = np.ones(long_diff.shape)
+        cos_2_sigma_m = np.zeros(long_diff.shape)
+
+        # Indexes of the pairs which haven't converged yet.
+        # Only those pairs are updated in each iteration, so a few slowly converging pairs
+        # don't make every other pair pay for the extra iterations.
+        active = np.flatnonzero(np.ones(long_diff.shape, dtype=bool))
+
+        for _ in range(max_iterations):
+            if active.size == 0: break
+
+            sin_lambda, cos_lambda = np.sin(lambda_.flat[active]), np.cos(lambda_.flat[active])
+            su_a, cu_a = sin_u_a.flat[active], cos_u_a.flat[active]
+            su_b, cu_b = sin_u_b.flat[active], cos_u_b.flat[active]
+
+            cur_sin_sigma = np.sqrt((cu_b * sin_lambda) ** 2 + (cu_a * su_b - su_a * cu_b * cos_lambda) ** 2)
+            cur_cos_sigma = su_a * su_b + cu_a * cu_b * cos_lambda
+            cur_sigma = np.arctan2(cur_sin_sigma, cur_cos_sigma)
+
+            # Coincident points have sin_sigma equal to 0 (their distance is 0).
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sin_alpha = np.where(cur_sin_sigma == 0, 0.0, cu_a * cu_b * sin_lambda / cur_sin_sigma)
+                cur_cos_sq_alpha = 1 - sin_alpha ** 2
+                # Points on the equator have cos_sq_alpha equal to 0.
+                cur_cos_2_sigma_m = np.where(cur_cos_sq_alpha == 0, 0.0,
+                                             cur_cos_sigma - 2 * su_a * su_b / cur_cos_sq_alpha)
+
+            c = f / 16 * cur_cos_sq_alpha * (4 + f * (4 - 3 * cur_cos_sq_alpha))
+            lambda_prev = lambda_.flat[active]
+            cur_lambda = long_diff.flat[active] + (1 - c) * f * sin_alpha * (
+                cur_sigma + c * cur_sin_sigma * (cur_cos_2_sigma_m + c * cur_cos_sigma *
+                                                 (-1 + 2 * cur_cos_2_sigma_m ** 2)))
+
+            lambda_.flat[active] = cur_lambda
+            sin_sigma.flat[active] = cur_sin_sigma
+            cos_sigma.flat[active] = cur_cos_sigma
+            sigma.flat[active] = cur_sigma
+            cos_sq_alpha.flat[active] = cur_cos_sq_alpha
+            cos_2_sigma_m.flat[active] = cur_cos_2_sigma_m
+
+            active = active[np.abs(cur_lambda - lambda_prev) > tolerance]
+
+        u_sq = cos_sq_alpha * (a ** 2 - b ** 2) / b ** 2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2_sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2) -
+            big_b / 6 * cos_2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2_sigma_m ** 2)))
+
+        distances = b * big_a * (sigma - delta_sigma)
+
+        # Vincenty's formula doesn't converge for nearly antipodal points,
+        # those (rare) pairs are calculated using geopy.
+        for idx in active:
+            distances.flat[idx] = gpy_distance.geodesic((lat_a.flat[idx], long_a.flat[idx]),
+                                                        (lat_b.flat[idx], long_b.flat[idx])).km
+
+        return distances
+
+    @staticmethod
+    def calc_distances(points_a, points_b) -> np.ndarray:
+        """
+        Calculates the distances between pairs of points on Earth.
+        Each point consists of three values, Latitude, Longitude, and height above the surface (in km).
+
+        Either argument may also be a single point, which is then paired with every point of the other argument
+        (for example, the location of the target against the locations of all the entities in a timestamp).
+
+        :param points_a: the first points, array-like of shape (n, 3) or (3,).
+        :param points_b: the second points, array-like of shape (n, 3) or (3,).
+        :return: an array of the distances (in km) between each pair of points.
+        """
+
+        points_a = DistanceEngine._to_points_array(points_a)
+        points_b = DistanceEngine._to_points_array(points_b)
+
+        horiz_distances = DistanceEngine.calc_horizontal_distances(points_a[:, 0], points_a[:, 1],
+                                                                   points_b[:, 0], points_b[:, 1])
+
+        # Calculating the height difference between the points.
+        vert_distances = points_b[:, 2] - points_a[:, 2]
+
+        # Applying pythagoras theorem to calculate the distances between the pairs of points.
+        return np.hypot(horiz_distances, vert_distances)
+
+    @staticmethod
+    def calc_distances_within(points_a, points_b, max_distance: float, cache = None) -> tuple:
+        """
+        Finds the pairs of points that are closer than max_distance.
+        The pairs are filtered by prefilter first, so only the pairs that may be in range pay for the exact distance.
+
+        :param points_a: the first points, array-like of shape (n, 3) or (3,).
+        :param points_b: the second points, array-like of shape (n, 3) or (3,).
+        :param max_distance: the distance (in km) from which pairs are out of range.
+        :param cache: an optional DistanceCache the exact distances are looked up in.
+        :return: a tuple of the positions of the pairs in range (in ascending order), their distances,
+                 and a dictionary of the amount of pairs that each stage handled (see FILTER_STATS).
+        """
+
+        points_a = DistanceEngine._to_points_array(points_a)
+        points_b = DistanceEngine._to_points_array(points_b)
+        points_a, points_b = np.broadcast_arrays(points_a, points_b)
+
+        candidates, stats = DistanceEngine.prefilter(points_a, points_b, max_distance)
+        candidates = np.flatnonzero(candidates)
+
+        stats["evaluated"] = len(candidates)
+
+        if len(candidates) == 0:
+            stats["within_range"] = 0
+            return candidates, np.empty(0), stats
+
+        calculator = DistanceEngine if cache is None else cache
+        distances = calculator.calc_distances(points_a[candidates], points_b[candidates])
+        within_range = distances < max_distance
+
+        stats["within_range"] = int(within_range.sum())
+
+        return candidates[within_range], distances[within_range], stats
@@ -0,0 +1,109 @@
+from DistanceEngine import DistanceEngine
+import numpy as np
+import pandas as pd
+
+class DistanceSweep:
+    """
+    Calculates the distances between the target and every other entity (at every shared timestamp) once,
+    and answers any number of distance_from_target thresholds using sorted array lookups.
+
+    Useful when the same dataset is queried repeatedly with different distances,
+    as a query no longer regroups the data or recalculates any distance.
+    """
+
+    def __init__(self, total_df: pd.DataFrame, sus_df: pd.DataFrame, cache = None):
+        """
+        Calculates and caches the distances.
+
+        :param total_df: DataFrame that contains data about the path of entities including a target.
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param cache: an optional DistanceCache the distances are looked up in (useful when the sweep is rebuilt
+                      for the same data, for example in a later session with a cache saved to the disk).
+        """
+
+        target_path = sus_df[["ts", "lat", "long", "height"]].rename(
+            columns={"lat": "target_lat", "long": "target_long", "height": "target_height"})
+
+        # Pairing each entity (except target) with the location of the target at the same timestamp.
+        non_target_entities = total_df[~total_df["id"].isin(sus_df["id"])]
+        pairs = non_target_entities[["id", "ts", "lat", "long", "height"]].merge(target_path, on="ts", how="inner")
+
+        calculator = DistanceEngine if cache is None else cache
+        pairs["distance"] = calculator.calc_distances(
+            pairs[["target_lat", "target_long", "target_height"]].to_numpy(dtype=float),
+            pairs[["lat", "long", "height"]].to_numpy(dtype=float))
+
+        # Sorted by timestamp and then by distance, so the entities in range at a timestamp are a prefix of its block.
+        self.entities = pairs.sort_values(by=["ts", "distance"], kind="stable").reset_index(drop=True)
+
+        distances = self.entities["distance"].to_numpy()
+        self._distances = distances
+
+        # Start and end rows of each timestamp block.
+        self._ts_blocks = {current_ts: (rows[0], rows[-1] + 1)
+                           for current_ts, rows in self.entities.groupby(by="ts", sort=False).indices.items()}
+
+        # All the distances sorted, and the rows they belong to, for queries over the whole path.
+        self._order = np.argsort(distances, kind="stable")
+        self._sorted_distances = distances[self._order]
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __contains__(self, ts) -> bool:
+        return ts in self._ts_blocks
+
+    def count(self, distance_from_target: float) -> int:
+        """
+        :param distance_from_target: the maximum distance from the target (in km).
+        :return: the amount of (entity, timestamp) pairs closer than distance_from_target to the target.
+        """
+
+        return int(np.searchsorted(self._sorted_distances, distance_from_target, side="left"))
+
+    def query_all(self, distance_from_target: float) -> pd.DataFrame:
+        """
+        Finds every entity (at every timestamp) closer than distance_from_target to the target.
+
+        :param distance_from_target: the maximum distance from the target (in km).
+        :return: DataFrame of the pairs found, sorted by distance.
+        """
+
+        return self.entities.iloc[self._order[:self.count(distance_from_target)]]
+
+    def sweep(self, thresholds) -> pd.Series:
+        """
+        Counts the entities in range for a whole sweep of thresholds at once.
+
+        :param thresholds: the distances from the target to check (in km).
+        :return: Series of the amount of pairs in range, indexed by the thresholds.
+        """
+
+        thresholds = np.asarray(thresholds, dtype=float)
+
+        return pd.Series(np.searchsorted(self._sorted_distances, thresholds, side="left"),
+                         index=pd.Index(thresholds, name="distance_from_target"), name="count")
+
+    def query(self, ts, location: tuple, max_distance: float, filter_stats: dict = None) -> tuple:
+        """
+        Finds the entities closer than max_distance to the target at a specific timestamp.
+        Has the same signature as SpatialIndex.query so it can be passed to the finder as an index.
+
+        :param ts: the timestamp to search in.
+        :param location: unused, the location of the target is already part of the cached distances.
+        :param max_distance: the maximum distance from the target.
+        :param filter_stats: an optional dictionary whose "evaluated" counter is increased by the amount of
+                             cached distances of the timestamp searched.
+        :return: a tuple of the rows (positions in self.entities) of the entities found and their distances.
+        """
+
+        if ts not in self._ts_blocks:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=float)
+
+        start, end = self._ts_blocks[ts]
+        distances = self._distances[start:end]
+
+        if filter_stats is not None: filter_stats["evaluated"] = filter_stats.get("evaluated", 0) + len(distances)
+        end = start + int(np.searchsorted(distances, max_distance, side="left"))
+
+        return np.arange(start, end), distances[:end - start]
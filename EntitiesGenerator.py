@@ -1,6 +1,8 @@
+from Profiler import Profiler
 import numpy as np
 import pandas as pd
 import random as rand
+import os
 from datetime import datetime, timedelta
 
 class EntitiesGenerator:
@@ -8,6 +10,9 @@ class EntitiesGenerator:
     Generates entity path data to test RangedEntitiesFinder.
     """
 
+    # The time of the first track of the batch generator (fixed so the output is reproducible).
+    BATCH_START_TIME = datetime(2024, 1, 1)
+
     @staticmethod
     def _generate_entity_path(entity_num: int, num_tracks: int, increments: tuple, starting_loc: tuple) -> pd.DataFrame:
         """
@@ -286,6 +291,205 @@ class EntitiesGenerator:
         # The parentheses are NOT redundant (they create a tuple data structure).
         return (all_entities, sus_path)
 
+    @staticmethod
+    def _wrap_coordinates(lat: np.ndarray, long: np.ndarray) -> tuple:
+        """
+        Wraps latitudes and longitudes that went past the poles or the antimeridian back to valid values.
+        A path that goes past a pole continues on the other side of it (latitude folds back, longitude flips by 180).
+
+        :param lat: the (unbounded) latitudes.
+        :param long: the (unbounded) longitudes.
+        :return: a tuple of latitudes in [-90, 90] and longitudes in [-180, 180).
+        """
+
+        folded_lat = (lat + 90) % 360
+        past_pole = folded_lat > 180
+
+        lat = np.where(past_pole, 360 - folded_lat, folded_lat) - 90
+        long = np.where(past_pole, long + 180, long)
+
+        return lat, (long + 180) % 360 - 180
+
+    @staticmethod
+    def _generate_batch_block(params: dict, track_start: int, track_end: int) -> pd.DataFrame:
+        """
+        Generates the tracks of all the entities between two step numbers, using the parameters
+        drawn by generate_entities_paths_batch.
+
+        :param params: the parameters of the paths (ids, starting locations and increments of all the entities).
+        :param track_start: the first step number of the block.
+        :param track_end: the step number after the last step number of the block.
+        :return: a DataFrame that contains the block, ordered by timestamp and then by id.
+        """
+
+        steps = np.arange(track_start, track_end)
+        num_entities = len(params["ids"])
+
+        # Every path is linear: starting location + increments * step number, calculated for all the entities at once.
+        # The arrays are of shape (steps, entities), so flattening them orders the rows by timestamp.
+        lat = params["starting_locations"][:, 0] + np.outer(steps, params["increments"][:, 0])
+        long = params["starting_locations"][:, 1] + np.outer(steps, params["increments"][:, 1])
+        height = params["starting_locations"][:, 2] + np.outer(steps, params["increments"][:, 2])
+
+        lat, long = EntitiesGenerator._wrap_coordinates(lat, long)
+
+        timestamps = np.datetime64(params["start_time"], "ns") + steps.astype("timedelta64[s]")
+
+        return pd.DataFrame({
+            "id": np.tile(params["ids"], len(steps)),
+            "ts": np.repeat(timestamps, num_entities),
+            "lat": lat.ravel(),
+            "long": long.ravel(),
+            "height": height.ravel()
+        })
+
+    @staticmethod
+    def _write_block(block: pd.DataFrame, file_path: str, data_format: str, writers: dict):
+        """
+        Appends a block of tracks to a file.
+
+        :param block: the block to write.
+        :param file_path: the path of the file.
+        :param data_format: "csv" or "parquet".
+        :param writers: open Parquet writers (file path -> writer), new writers are added to it.
+        """
+
+        if data_format == "csv":
+            block.to_csv(file_path, mode="a", header=not os.path.exists(file_path), index=False)
+            return
+
+        # Imported here as pyarrow is only needed for Parquet files.
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(block, preserve_index=False)
+
+        if file_path not in writers: writers[file_path] = pq.ParquetWriter(file_path, table.schema)
+
+        writers[file_path].write_table(table)
+
+    @staticmethod
+    def _draw_batch_params(num_entities: int, num_tracks: int, seed: int, proximity_chance: float,
+                           rand_sus_num: bool) -> tuple:
+        """
+        Draws the random parameters of the paths generated by generate_entities_paths_batch.
+
+        :return: a tuple of the parameters of all the entities and the parameters of the target alone
+                 (see _generate_batch_block).
+        """
+
+        rng = np.random.default_rng(seed)
+
+        # Drawing the starting locations and the increments of all the entities at once,
+        # from the same distributions generate_entities_paths uses.
+        starting_locations = np.column_stack((rng.uniform(low=-90, high=90, size=(num_entities, 2)),
+                                              rng.uniform(low=0.0, high=100.0, size=num_entities)))
+        increments = np.column_stack((rng.uniform(low=-0.1, high=0.1, size=(num_entities, 2)),
+                                      rng.uniform(low=-5.0, high=5.0, size=num_entities)))
+
+        sus_idx = 0
+
+        # Randomizing the sus target.
+        if rand_sus_num and num_entities > 1: sus_idx = int(rng.integers(1, num_entities))
+
+        # Making entities come in proximity to the target randomly.
+        in_proximity = rng.random(num_entities) < proximity_chance
+        in_proximity[sus_idx] = False
+        proximity_entities = np.flatnonzero(in_proximity)
+
+        # The step at which each of those entities is close to the target, and its location at that step
+        # (the location of the target plus a random offset of up to 1 per axis).
+        cross_steps = rng.integers(0, num_tracks, size=len(proximity_entities))
+        anchors = (starting_locations[sus_idx] + increments[sus_idx] * cross_steps[:, np.newaxis] +
+                   rng.random((len(proximity_entities), 3)))
+
+        # Moving the starting location of each entity so its linear path goes through its anchor at the crossing step.
+        starting_locations[proximity_entities] = anchors - increments[proximity_entities] * cross_steps[:, np.newaxis]
+
+        params = {"ids": np.arange(1, num_entities + 1), "starting_locations": starting_locations,
+                  "increments": increments, "start_time": EntitiesGenerator.BATCH_START_TIME}
+        sus_params = {"ids": params["ids"][[sus_idx]], "starting_locations": starting_locations[[sus_idx]],
+                      "increments": increments[[sus_idx]], "start_time": EntitiesGenerator.BATCH_START_TIME}
+
+        return (params, sus_params)
+
+    @staticmethod
+    def generate_entities_paths_batch(num_entities: int = 5, num_tracks: int = 10, seed: int = None,
+                                      proximity_chance: float = 0.5, rand_sus_num: bool = False,
+                                      out_dir: str = None, chunk_tracks: int = 1000,
+                                      data_format: str = "csv", profiler: Profiler = None) -> tuple:
+        """
+        Generates paths of entities like generate_entities_paths, but for all the entities at once
+        as NumPy arrays, so it scales to benchmark sized data (no per entity DataFrames or repeated concatenation,
+        and no module globals).
+
+        Entities which come in proximity to the target get a path that goes through a random point near the
+        location of the target at a random step (the same anchored path _generate_path_from_anchor generates).
+        Paths that go past a pole or the antimeridian are wrapped so all the coordinates stay valid.
+
+        :param num_entities: the number of entities that will appear in the data.
+        :param num_tracks: the number of data rows per entity.
+        :param seed: the seed of the random generator, the same seed always generates the same data.
+        :param proximity_chance: the chance of each entity (other than the target) to come in proximity to the target.
+        :param rand_sus_num: True if the number of the suspicious target should be randomized.
+        :param out_dir: if given, the data is written to <out_dir>/total.<format> and <out_dir>/sus.<format>
+                        in chunks of chunk_tracks timestamps instead of being kept in memory.
+        :param chunk_tracks: the number of timestamps per chunk written to the disk.
+        :param data_format: the format of the files written to the disk, "csv" or "parquet".
+        :param profiler: an optional Profiler that records the time of every stage (parameters, generate, write)
+                         and counters (rows, chunks).
+        :return: a tuple that contains the path of all entities (including target), and separately the path of the
+                 suspicious target, both ordered by timestamp. If out_dir is given, the paths of the two files instead.
+        """
+
+        if profiler is None: profiler = Profiler.DISABLED
+
+        with profiler.stage("parameters"):
+            params, sus_params = EntitiesGenerator._draw_batch_params(num_entities, num_tracks, seed,
+                                                                      proximity_chance, rand_sus_num)
+
+        if out_dir is None:
+            with profiler.stage("generate"):
+                (total_df, sus_df) = (EntitiesGenerator._generate_batch_block(params, 0, num_tracks),
+                                      EntitiesGenerator._generate_batch_block(sus_params, 0, num_tracks))
+
+            profiler.count("rows", len(total_df))
+
+            return (total_df, sus_df)
+
+        if data_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported format: '{data_format}' (expected 'csv' or 'parquet').")
+
+        os.makedirs(out_dir, exist_ok=True)
+        total_path = os.path.join(out_dir, "total." + data_format)
+        sus_path = os.path.join(out_dir, "sus." + data_format)
+
+        # Starting from empty files, as CSV chunks are appended.
+        for file_path in (total_path, sus_path):
+            if os.path.exists(file_path): os.remove(file_path)
+
+        writers = {}
+
+        try:
+            # Only a single chunk of timestamps is in memory at any moment.
+            for track_start in range(0, num_tracks, chunk_tracks):
+                track_end = min(track_start + chunk_tracks, num_tracks)
+
+                with profiler.stage("generate"):
+                    block = EntitiesGenerator._generate_batch_block(params, track_start, track_end)
+                    sus_block = EntitiesGenerator._generate_batch_block(sus_params, track_start, track_end)
+
+                with profiler.stage("write"):
+                    EntitiesGenerator._write_block(block, total_path, data_format, writers)
+                    EntitiesGenerator._write_block(sus_block, sus_path, data_format, writers)
+
+                profiler.count("rows", len(block))
+                profiler.count("chunks")
+        finally:
+            for writer in writers.values(): writer.close()
+
+        return (total_path, sus_path)
+
     @staticmethod
     def generate_entity_id(id_len: int = 5) -> str:
         # Catching a case where length value is incorrect.
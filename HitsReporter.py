@@ -0,0 +1,71 @@
+import pandas as pd
+import sys
+import time
+
+class HitsReporter:
+    """
+    Prints the entities found close to the target (the result of RangedEntitiesFinder).
+
+    Printing is rate limited so it never dominates the runtime on large results:
+    only the first max_hits entities of a result are printed in full, and a result that arrives
+    less than min_interval seconds after the previous report is summarized in a single line.
+    """
+
+    def __init__(self, max_hits: int = 20, min_interval: float = 0.0, stream = None):
+        """
+        :param max_hits: the maximum amount of entities printed in full per report.
+        :param min_interval: the minimum amount of seconds between two full reports.
+        :param stream: the stream to print to, stdout if not given.
+        """
+
+        # Catching a case where the amount of hits is incorrect.
+        if max_hits < 0: max_hits = 20
+
+        self.max_hits = max_hits
+        self.min_interval = min_interval
+        self.stream = stream
+        self._last_report_time = None
+
+    def _print(self, *args, **kwargs):
+        print(*args, file=self.stream if self.stream is not None else sys.stdout, **kwargs)
+
+    def report(self, hits: pd.DataFrame):
+        """
+        Prints the entities found close to the target.
+
+        :param hits: the DataFrame returned by RangedEntitiesFinder.locate_closest_entities_to_target.
+        """
+
+        now = time.monotonic()
+        rate_limited = (self._last_report_time is not None and
+                        now - self._last_report_time < self.min_interval)
+
+        if rate_limited or hits.empty:
+            self._print(f"{len(hits)} entity(ies) found close to target.")
+            return
+
+        self._last_report_time = now
+
+        print_hits = hits.head(self.max_hits)
+
+        # Rounding the coordinate values of the entities (both that are close to target and of target itself).
+        # Used purely for printing, and only for the rows that are actually printed.
+        rounded = print_hits.round(dict.fromkeys(["distance", "lat", "long", "height",
+                                                  "target_lat", "target_long", "target_height"], 3))
+
+        self._print("Format of coordinates: (latitude [deg], longitude [deg], height [km])\n")
+
+        # Previous timestamp is used for checking if the current timestamp was printed already.
+        prev_ts = None
+
+        for hit in rounded.itertuples(index=False):
+            if prev_ts != hit.ts:
+                self._print(f"---------- Timestamp {hit.ts} ----------")
+                prev_ts = hit.ts
+
+            self._print(f"Entity(ies): {hit.id} is/are close to target ({hit.distance} km)!\n"
+                        + f"Entity(ies) coordinates:\t{(hit.lat, hit.long, hit.height)}\n"
+                        + f"Target coordinates:\t\t{(hit.target_lat, hit.target_long, hit.target_height)}\n")
+
+        if len(hits) > len(print_hits):
+            self._print(f"... and {len(hits) - len(print_hits)} more entity(ies) close to target.")
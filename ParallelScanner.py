@@ -0,0 +1,130 @@
+from DistanceEngine import DistanceEngine
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import os
+
+class ParallelScanner:
+    """
+    Runs the proximity scan of the finder on several cores.
+
+    The arrays of the scan are copied once to shared memory, and every worker process attaches to them,
+    so no DataFrame is pickled. The rows are split to contiguous blocks which the workers scan using
+    the vectorized distance kernel, and the results are merged back in block order (so they're deterministic).
+    """
+
+    # Arrays attached by a worker process (name -> ndarray), set by _init_worker.
+    _worker_arrays = {}
+    # Shared memory blocks attached by a worker process, kept referenced while the worker lives.
+    _worker_shms = []
+
+    @staticmethod
+    def _to_shared(array: np.ndarray) -> tuple:
+        """
+        Copies an array to a new shared memory block.
+
+        :param array: the array to copy.
+        :return: a tuple of the shared memory block and a description (name, shape, dtype) used for attaching to it.
+        """
+
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+
+        return shm, (shm.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def _init_worker(descriptions: dict):
+        """
+        Attaches a worker process to the shared arrays.
+
+        :param descriptions: mapping between the name of each array and its (shm name, shape, dtype).
+        """
+
+        for array_name, (shm_name, shape, dtype) in descriptions.items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            ParallelScanner._worker_shms.append(shm)
+            ParallelScanner._worker_arrays[array_name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    @staticmethod
+    def _scan_block(start: int, end: int, distance_from_target: float, arrays: dict = None) -> tuple:
+        """
+        Scans a block of rows.
+
+        :param start: the first row of the block.
+        :param end: the row after the last row of the block.
+        :param distance_from_target: the maximum distance from the target allowed.
+        :param arrays: the arrays to scan, the shared arrays of the worker if not given.
+        :return: a tuple of the rows in range, their distances and the pre-filter counters of the block.
+        """
+
+        if arrays is None: arrays = ParallelScanner._worker_arrays
+
+        entity_points = arrays["entity_points"][start:end]
+        target_points = arrays["target_points"][arrays["target_idx"][start:end]]
+
+        within_range, distances, filter_stats = DistanceEngine.calc_distances_within(target_points, entity_points,
+                                                                                     distance_from_target)
+
+        return within_range + start, distances, filter_stats
+
+    @staticmethod
+    def scan(entity_points: np.ndarray, target_idx: np.ndarray, target_points: np.ndarray,
+             distance_from_target: float, workers: int = None, blocks_per_worker: int = 4,
+             filter_stats: dict = None) -> tuple:
+        """
+        Finds the rows whose entity is closer than distance_from_target to the target.
+
+        :param entity_points: the locations of the entities, array of shape (n, 3).
+        :param target_idx: for every row, the position of the location of the target at the same timestamp in target_points.
+        :param target_points: the locations of the target, array of shape (m, 3).
+        :param distance_from_target: the maximum distance from the target allowed (in km).
+        :param workers: the amount of worker processes, the amount of cores if not given.
+        :param blocks_per_worker: the amount of blocks each worker gets (on average), for balancing the load.
+        :param filter_stats: an optional dictionary the pre-filter counters of all the blocks are added to
+                             (see DistanceEngine.calc_distances_within).
+        :return: a tuple of the rows in range (in ascending order) and their distances.
+        """
+
+        if workers is None: workers = os.cpu_count() or 1
+
+        arrays = {"entity_points": np.ascontiguousarray(entity_points, dtype=np.float64),
+                  "target_idx": np.ascontiguousarray(target_idx, dtype=np.int64),
+                  "target_points": np.ascontiguousarray(target_points, dtype=np.float64)}
+
+        rows_amount = len(arrays["entity_points"])
+        blocks_amount = max(1, min(workers * blocks_per_worker, rows_amount))
+        bounds = np.linspace(0, rows_amount, blocks_amount + 1).astype(np.int64)
+
+        # A single worker scans in the current process, there is nothing to share.
+        if workers <= 1 or rows_amount == 0:
+            results = [ParallelScanner._scan_block(start, end, distance_from_target, arrays)
+                       for start, end in zip(bounds[:-1], bounds[1:])]
+        else:
+            shms = []
+
+            try:
+                descriptions = {}
+
+                for array_name, array in arrays.items():
+                    shm, descriptions[array_name] = ParallelScanner._to_shared(array)
+                    shms.append(shm)
+
+                with ProcessPoolExecutor(max_workers=workers, initializer=ParallelScanner._init_worker,
+                                         initargs=(descriptions,)) as executor:
+                    # map() returns the results in the order of the blocks regardless of which worker finished first.
+                    results = list(executor.map(ParallelScanner._scan_block, bounds[:-1], bounds[1:],
+                                                [distance_from_target] * blocks_amount))
+            finally:
+                for shm in shms:
+                    shm.close()
+                    shm.unlink()
+
+        if filter_stats is not None:
+            for _, _, block_stats in results:
+                for stat_name, amount in block_stats.items():
+                    filter_stats[stat_name] = filter_stats.get(stat_name, 0) + amount
+
+        if not results: return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+
+        return (np.concatenate([rows for rows, _, _ in results]),
+                np.concatenate([distances for _, distances, _ in results]))
@@ -0,0 +1,141 @@
+import contextlib
+import tracemalloc
+import json
+import time
+
+class Profiler:
+    """
+    Collects where the time of a run goes: timers per stage, counters, and optionally memory allocations per stage.
+
+    Pass a profiler to RangedEntitiesFinder.locate_closest_entities_to_target or to
+    EntitiesGenerator.generate_entities_paths_batch, then read timers, counters and allocations (or summary()).
+    Without a profiler they use Profiler.DISABLED, whose methods return immediately,
+    so the instrumentation costs close to nothing when it's not used.
+
+    If trace_path is given, every stage is also written to it as a JSON line when it ends,
+    and the totals are written as the last line by close().
+    """
+
+    def __init__(self, enabled: bool = True, track_allocations: bool = False, trace_path: str = None):
+        """
+        :param enabled: False for a profiler that records nothing.
+        :param track_allocations: True if the memory allocated by every stage should be recorded (using tracemalloc,
+                                  which slows down the run considerably).
+        :param trace_path: an optional path of a JSON lines file the stages are written to.
+        """
+
+        self.enabled = enabled
+        self.track_allocations = track_allocations and enabled
+
+        # Stage name -> total seconds, and the amount of times the stage ran.
+        self.timers = {}
+        self.calls = {}
+        # Counter name -> amount.
+        self.counters = {}
+        # Stage name -> {"allocated_bytes": net allocated, "peak_bytes": largest peak of a single run}.
+        self.allocations = {}
+
+        self._trace_file = open(trace_path, "w") if trace_path is not None and enabled else None
+        self._started_tracemalloc = False
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stage(self, name: str):
+        """
+        Times a stage of the run (stages of the same name are added up). Stages shouldn't be nested
+        when allocations are tracked, as the peak of the inner stage resets the peak of the outer one.
+
+        :param name: the name of the stage.
+        :return: a context manager that wraps the stage.
+        """
+
+        if not self.enabled: return Profiler._NO_STAGE
+
+        return self._timed_stage(name)
+
+    @contextlib.contextmanager
+    def _timed_stage(self, name: str):
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+            trace_record = {"stage": name, "seconds": seconds}
+
+            if self.track_allocations:
+                current_memory, peak_memory = tracemalloc.get_traced_memory()
+                stage_allocations = self.allocations.setdefault(name, {"allocated_bytes": 0, "peak_bytes": 0})
+                stage_allocations["allocated_bytes"] += current_memory - start_memory
+                stage_allocations["peak_bytes"] = max(stage_allocations["peak_bytes"], peak_memory - start_memory)
+                trace_record.update(allocated_bytes=current_memory - start_memory,
+                                    peak_bytes=peak_memory - start_memory)
+
+            if self._trace_file is not None: self._trace_file.write(json.dumps(trace_record) + "\n")
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Adds to a counter.
+
+        :param name: the name of the counter.
+        :param amount: the amount to add.
+        """
+
+        if not self.enabled: return
+
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def count_all(self, amounts: dict):
+        """
+        Adds to several counters at once.
+
+        :param amounts: mapping between the names of the counters and the amounts to add.
+        """
+
+        if not self.enabled: return
+
+        for name, amount in amounts.items(): self.count(name, amount)
+
+    def summary(self) -> dict:
+        """
+        :return: the timers, the amount of calls of every stage, the counters and the allocations.
+        """
+
+        return {"timers": dict(self.timers), "calls": dict(self.calls),
+                "counters": dict(self.counters), "allocations": {name: dict(stage_allocations)
+                                                                 for name, stage_allocations in self.allocations.items()}}
+
+    def close(self):
+        """
+        Writes the totals to the trace file and closes it, and stops tracking allocations if this profiler started it.
+        """
+
+        if self._trace_file is not None:
+            self._trace_file.write(json.dumps({"summary": self.summary()}) + "\n")
+            self._trace_file.close()
+            self._trace_file = None
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+# A single reusable context manager for the stages of a disabled profiler.
+Profiler._NO_STAGE = contextlib.nullcontext()
+# The profiler used when none is given.
+Profiler.DISABLED = Profiler(enabled=False)
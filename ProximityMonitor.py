@@ -0,0 +1,215 @@
+from DistanceEngine import DistanceEngine
+from RangedEntitiesFinder import RangedEntitiesFinder
+from collections import OrderedDict
+import itertools
+import math
+import numpy as np
+import pandas as pd
+
+class ProximityMonitor:
+    """
+    Monitors a live feed of positions and raises an alert the moment an entity comes within
+    distance_from_target of the target.
+
+    Only the latest position of the target and of every entity is kept. The entities are stored in a
+    grid of ECEF cells (a bounded spatial index), so the cost of an update depends on the size of the update
+    (and on the amount of entities near the target), not on the history of the feed.
+    """
+
+    def __init__(self, target_id, distance_from_target: float = 1000.0, max_entities: int = 100_000,
+                 max_age = None, on_alert = None):
+        """
+        :param target_id: the id of the target.
+        :param distance_from_target: the maximum distance from the target (in km) before an alert is raised.
+        :param max_entities: the maximum amount of entities kept, the least recently updated ones are dropped.
+        :param max_age: if given, entities that weren't updated for longer than it (compared with the latest
+                        timestamp seen) are dropped.
+        :param on_alert: an optional function called with the DataFrame of the alerts of every update that has any.
+        """
+
+        if distance_from_target <= 0:
+            raise ValueError("Max distance can't be smaller or equal to 0!")
+
+        self.target_id = target_id
+        self.distance_from_target = distance_from_target
+        self.max_entities = max_entities
+        self.max_age = max_age
+        self.on_alert = on_alert
+
+        # The latest location of the target: (ts, point) or None before the first update of the target.
+        self._target = None
+        # The latest location of each entity: id -> (ts, point, cell), ordered from the least recently updated.
+        self._entities = OrderedDict()
+        # The grid: cell -> ids of the entities in the cell.
+        self._grid = {}
+        # The entities that are currently in range (an alert was already raised for them).
+        self._in_range = set()
+        self._latest_ts = None
+        self._max_height = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    @property
+    def in_range(self) -> set:
+        """
+        :return: the ids of the entities that are currently in range of the target.
+        """
+
+        return set(self._in_range)
+
+    def _cells_of(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: locations (latitude, longitude, height), array of shape (n, 3).
+        :return: the grid cells that contain the locations, array of shape (n, 3).
+        """
+
+        return np.floor(DistanceEngine.to_ecef(points) / self.distance_from_target).astype(np.int64)
+
+    def _remove_entity(self, entity_id):
+        """
+        Removes an entity from the monitor.
+
+        :param entity_id: the id of the entity.
+        """
+
+        _, _, cell = self._entities.pop(entity_id)
+
+        cell_ids = self._grid[cell]
+        cell_ids.discard(entity_id)
+        if not cell_ids: del self._grid[cell]
+
+        self._in_range.discard(entity_id)
+
+    def _set_entity(self, entity_id, ts, point: np.ndarray, cell: tuple):
+        """
+        Stores the latest location of an entity (older locations than the stored one are ignored).
+
+        :param entity_id: the id of the entity.
+        :param ts: the timestamp of the location.
+        :param point: the location (latitude, longitude, height).
+        :param cell: the grid cell that contains the location.
+        :return: True if the location was stored.
+        """
+
+        if entity_id in self._entities:
+            if ts < self._entities[entity_id][0]: return False
+
+            _, _, old_cell = self._entities[entity_id]
+            self._grid[old_cell].discard(entity_id)
+            if not self._grid[old_cell]: del self._grid[old_cell]
+
+        self._entities[entity_id] = (ts, point, cell)
+        self._entities.move_to_end(entity_id)
+        self._grid.setdefault(cell, set()).add(entity_id)
+        self._max_height = max(self._max_height, float(point[2]))
+
+        return True
+
+    def _evict(self):
+        """
+        Drops the least recently updated entities over max_entities, and the entities older than max_age.
+        """
+
+        while len(self._entities) > self.max_entities:
+            self._remove_entity(next(iter(self._entities)))
+
+        if self.max_age is None or self._latest_ts is None: return
+
+        while self._entities:
+            oldest_id = next(iter(self._entities))
+            if self._latest_ts - self._entities[oldest_id][0] <= self.max_age: break
+            self._remove_entity(oldest_id)
+
+    def _entities_near_target(self) -> set:
+        """
+        :return: the ids of the entities in the grid cells around the target that may be in range.
+        """
+
+        target_point = self._target[1]
+        search_radius = self.distance_from_target * DistanceEngine.max_chord_factor(
+            max(self._max_height, target_point[2]))
+        cells_reach = math.ceil(search_radius / self.distance_from_target)
+
+        target_cell = self._cells_of(target_point)[0]
+        near_ids = set()
+
+        for offset in itertools.product(range(-cells_reach, cells_reach + 1), repeat=3):
+            cell = (target_cell[0] + offset[0], target_cell[1] + offset[1], target_cell[2] + offset[2])
+            near_ids.update(self._grid.get(cell, ()))
+
+        return near_ids
+
+    def update(self, positions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Applies a batch of position updates (rows of id, ts, lat, long, height) and checks for new proximities.
+
+        :param positions: the position updates, may include updates of the target.
+        :return: DataFrame (with the columns of RangedEntitiesFinder.RESULT_COLUMNS) of the entities that came within
+                 range of the target in this update. An entity raises an alert again only after it left the range.
+        """
+
+        empty_alerts = pd.DataFrame(columns=RangedEntitiesFinder.RESULT_COLUMNS)
+
+        if positions.empty: return empty_alerts
+
+        is_target = (positions["id"] == self.target_id).to_numpy()
+        target_moved = False
+
+        # Applying the latest update of the target.
+        for target_row in positions[is_target].itertuples(index=False):
+            if self._target is None or target_row.ts >= self._target[0]:
+                self._target = (target_row.ts, np.array([target_row.lat, target_row.long, target_row.height], dtype=float))
+                target_moved = True
+
+        updated_ids = set()
+
+        entity_positions = positions[~is_target]
+        entity_points = entity_positions[["lat", "long", "height"]].to_numpy(dtype=float)
+        # Calculating the cells of the whole batch at once.
+        entity_cells = self._cells_of(entity_points)
+
+        for entity_id, ts, point, cell in zip(entity_positions["id"], entity_positions["ts"],
+                                              entity_points, map(tuple, entity_cells.tolist())):
+            if self._set_entity(entity_id, ts, point, cell): updated_ids.add(entity_id)
+
+        batch_latest_ts = positions["ts"].max()
+        if self._latest_ts is None or batch_latest_ts > self._latest_ts: self._latest_ts = batch_latest_ts
+
+        self._evict()
+
+        if self._target is None: return empty_alerts
+
+        # Only the entities that moved need to be checked, plus the entities around the target if it moved
+        # (and the entities that were in range, which might not be anymore).
+        candidates = {entity_id for entity_id in updated_ids if entity_id in self._entities}
+
+        if target_moved: candidates |= self._entities_near_target() | self._in_range
+
+        if not candidates: return empty_alerts
+
+        candidates = list(candidates)
+        entity_points = np.array([self._entities[entity_id][1] for entity_id in candidates])
+        distances = DistanceEngine.calc_distances(self._target[1], entity_points)
+        within_range = distances < self.distance_from_target
+
+        new_alerts = []
+
+        for entity_id, entity_point, distance, is_within in zip(candidates, entity_points, distances, within_range):
+            if not is_within:
+                self._in_range.discard(entity_id)
+            elif entity_id not in self._in_range:
+                self._in_range.add(entity_id)
+                new_alerts.append((entity_id, self._entities[entity_id][0], distance, entity_point))
+
+        if not new_alerts: return empty_alerts
+
+        alerts = RangedEntitiesFinder._build_result(np.array([alert[0] for alert in new_alerts]),
+                                                    np.array([alert[1] for alert in new_alerts]),
+                                                    np.array([alert[2] for alert in new_alerts]),
+                                                    np.array([alert[3] for alert in new_alerts]),
+                                                    np.tile(self._target[1], (len(new_alerts), 1)))
+
+        if self.on_alert is not None: self.on_alert(alerts)
+
+        return alerts
@@ -1,16 +1,22 @@
 from geopy import distance as gpy_distance
+from DistanceEngine import DistanceEngine
+from SpatialIndex import SpatialIndex
+from DistanceSweep import DistanceSweep
+from HitsReporter import HitsReporter
+from ParallelScanner import ParallelScanner
+from TrajectoryRenderer import TrajectoryRenderer
+from TrackStore import TrackStore
+from Profiler import Profiler
+from DistanceCache import DistanceCache
+import numpy as np
 import pandas as pd
 import math
-import matplotlib.pyplot as plt
 
 class RangedEntitiesFinder:
     """
     Used to find entities within range of a specific target.
     """
 
-    display_fig = plt.figure(1)
-    plotter = display_fig.add_subplot(111, projection="3d")
-
     @staticmethod
     def _calc_distance(point_a: tuple, point_b: tuple) -> float:
         """
@@ -58,21 +64,114 @@ class RangedEntitiesFinder:
                 round(point_to_round[2], places_after_decimal))
 
     @staticmethod
-    def locate_closest_entities_to_target(total_df: pd.DataFrame, sus_df: pd.DataFrame, distance_from_target = 1000.0) -> bool:
+    def _build_result(ids: np.ndarray, timestamps: np.ndarray, distances: np.ndarray,
+                      locations: np.ndarray, sus_locations: np.ndarray) -> pd.DataFrame:
+        """
+        Builds the DataFrame returned by locate_closest_entities_to_target from the columns of the entities found.
+
+        :param ids: the ids of the entities found.
+        :param timestamps: the timestamps the entities were found at.
+        :param distances: the distances of the entities from the target.
+        :param locations: the locations of the entities, array of shape (n, 3).
+        :param sus_locations: the locations of the target at the same timestamps, array of shape (n, 3).
+        :return: DataFrame with the columns of RESULT_COLUMNS.
+        """
+
+        return pd.DataFrame({
+            "id": ids,
+            "ts": timestamps,
+            "distance": distances,
+            "lat": locations[:, 0],
+            "long": locations[:, 1],
+            "height": locations[:, 2],
+            "target_lat": sus_locations[:, 0],
+            "target_long": sus_locations[:, 1],
+            "target_height": sus_locations[:, 2]
+        })
+
+    @staticmethod
+    def _locate_in_parallel(store: TrackStore, sus_store: TrackStore, entity_id_to_filter,
+                            distance_from_target: float, workers: int) -> pd.DataFrame:
+        """
+        Locates the entities close to the target using several processes (see ParallelScanner).
+
+        :param store: the paths of the entities (may include the target).
+        :param sus_store: the path of the target.
+        :param entity_id_to_filter: the id of the target, left out of the entities.
+        :param distance_from_target: the maximum distance from the target allowed.
+        :param workers: the amount of processes, None for all the cores.
+        :return: DataFrame with the columns of RESULT_COLUMNS, in the same order the serial scan finds them.
+        """
+
+        # The location of the target at each of its timestamps (the first sample of every timestamp).
+        sus_points = sus_store.points[sus_store.offsets[:-1]]
+
+        # Matching every row of the store with the location of the target at the same timestamp.
+        # The rows are already ordered by timestamp, like the serial scan finds them.
+        target_of_ts = np.full(len(store.timestamps), -1, dtype=np.int64)
+        store_positions = store.positions_of(sus_store.timestamps)
+        target_of_ts[store_positions[store_positions >= 0]] = np.flatnonzero(store_positions >= 0)
+        target_idx = np.repeat(target_of_ts, np.diff(store.offsets))
+
+        # Rows of timestamps in which the target is absent, and the rows of the target itself, are dropped.
+        rows = np.flatnonzero((target_idx >= 0) & (store.ids != entity_id_to_filter))
+        entity_points = store.points[rows]
+        target_idx = target_idx[rows]
+
+        filter_stats = dict.fromkeys(DistanceEngine.FILTER_STATS, 0)
+        rows_found, distances_found = ParallelScanner.scan(entity_points, target_idx, sus_points,
+                                                           distance_from_target, workers, filter_stats=filter_stats)
+
+        result = RangedEntitiesFinder._build_result(store.ids[rows[rows_found]],
+                                                    sus_store.timestamps[target_idx[rows_found]],
+                                                    distances_found, entity_points[rows_found],
+                                                    sus_points[target_idx[rows_found]])
+        result.attrs["filter_stats"] = filter_stats
+
+        return result
+
+    # Columns of the DataFrame returned by locate_closest_entities_to_target.
+    RESULT_COLUMNS = ["id", "ts", "distance", "lat", "long", "height", "target_lat", "target_long", "target_height"]
+
+    @staticmethod
+    def locate_closest_entities_to_target(total_df: pd.DataFrame | TrackStore, sus_df: pd.DataFrame,
+                                          distance_from_target = 1000.0,
+                                          index: SpatialIndex | DistanceSweep = None,
+                                          reporter: HitsReporter = None, workers: int = 1,
+                                          plot: bool = False, profiler: Profiler = None,
+                                          cache: DistanceCache = None) -> pd.DataFrame:
         """
         Locates the closest entities within a defined distance from the **sus**picious target.
         The distance is measured in km.
 
-        :param total_df: DataFrame that contains data about the path of entities including a target.
+        :param total_df: DataFrame that contains data about the path of entities including a target,
+                         or a TrackStore built from it (reused by repeated queries without an index).
         :param sus_df: DataFrame that contains data about the path of the target.
         :param distance_from_target: the maximum distance from the target allowed.
-        :return: True if a non target entity was found close to the suspicious target entity. Otherwise, False.
+        :param index: an optional SpatialIndex built from total_df (or a DistanceSweep built from total_df and sus_df).
+                      When given, only the entities within range are evaluated instead of regrouping and scanning total_df.
+        :param reporter: an optional HitsReporter used for printing the entities found. Nothing is printed without it.
+        :param workers: the amount of processes that scan the data (see ParallelScanner), None for all the cores.
+                        Only used without an index.
+        :param plot: True if the paths should be displayed (see update_figure).
+        :param profiler: an optional Profiler that records the time of every stage (prepare, distances or index_query,
+                         parallel_scan, build_result, report, plot) and counters (timestamps, timestamps_skipped,
+                         the pre-filter counters and hits). With an index, only the "evaluated" pre-filter counter
+                         is recorded (the pairs the index queries evaluated).
+        :param cache: an optional DistanceCache the distances are looked up in (only used by the serial scan,
+                      without an index and with a single worker).
+        :return: DataFrame (see RESULT_COLUMNS) of every non target entity found close to the suspicious target entity,
+                 one row per entity per timestamp. Empty if none were found, None if the input is invalid.
+                 Without an index, result.attrs["filter_stats"] holds the amount of pairs pruned by each stage
+                 of the pre-filter and evaluated exactly (see DistanceEngine.calc_distances_within).
         """
 
+        if profiler is None: profiler = Profiler.DISABLED
+
         # Checking if distance is valid.
         if distance_from_target <= 0: 
             print("Max distance can't be smaller or equal to 0!")
-            return False
+            return None
 
         # Finding the target ID to drop from total_df for easier navigation in the data.
         entity_id_to_filter = list(sus_df["id"])[0]
@@ -80,107 +179,311 @@ class RangedEntitiesFinder:
         # Validating sus table.
         if all(sus_df["id"] != entity_id_to_filter):
             print("Sus table is invalid!")
-            return False
+            return None
+
+        with profiler.stage("prepare"):
+            # The path of the target as contiguous arrays, the location of the target at every timestamp
+            # is the first sample of the timestamp.
+            sus_store = TrackStore(sus_df)
+            sus_points = sus_store.points[sus_store.offsets[:-1]]
+
+            # Not needed when an index is used, as the index already holds the entities per timestamp.
+            # The paths are kept as a TrackStore, so the entities of every timestamp are a slice of its arrays.
+            # The target is left out per timestamp instead of copying total_df without it.
+            if index is None: store = total_df if isinstance(total_df, TrackStore) else TrackStore(total_df)
+
+        profiler.count("timestamps", len(sus_store.timestamps))
+
+        if workers != 1 and index is None:
+            with profiler.stage("parallel_scan"):
+                result = RangedEntitiesFinder._locate_in_parallel(store, sus_store, entity_id_to_filter,
+                                                                  distance_from_target, workers)
+
+            profiler.count("timestamps_skipped", np.count_nonzero(store.positions_of(sus_store.timestamps) < 0))
+        else:
+            if index is None: store_positions = store.positions_of(sus_store.timestamps)
+
+            # The amount of pairs handled by each stage of the pre-filter (see DistanceEngine.calc_distances_within).
+            filter_stats = dict.fromkeys(DistanceEngine.FILTER_STATS, 0)
+
+            # The columns of the result, collected per timestamp and joined once at the end.
+            ids_found = []
+            ts_found = []
+            distances_found = []
+            locations_found = []
+            sus_locations_found = []
+
+            # Iterating over the path of the target entity.
+            for sus_position, current_ts in enumerate(sus_store.timestamps):
+                if (store_positions[sus_position] < 0) if index is None else (current_ts not in index):
+                    profiler.count("timestamps_skipped")
+                    continue
+
+                # The current location of the target entity (sus).
+                sus_location = tuple(float(value) for value in sus_points[sus_position])
+
+                if index is None:
+                    # The current entities (except target) in the current timestamp, views of the store's arrays.
+                    entity_ids, entity_points = store.entities_of(store_positions[sus_position])
+
+                    not_target = entity_ids != entity_id_to_filter
+                    if not not_target.all(): entity_ids, entity_points = entity_ids[not_target], entity_points[not_target]
+
+                    # Calculating the distances between the target and all the entities of the current timestamp at once,
+                    # only for the entities that passed the cheap pre-filter (the rest are certainly out of range).
+                    with profiler.stage("distances"):
+                        rows_found, distances_calculated, ts_filter_stats = DistanceEngine.calc_distances_within(
+                            sus_location, entity_points, distance_from_target, cache)
+
+                    for stat_name in filter_stats: filter_stats[stat_name] += ts_filter_stats[stat_name]
+                else:
+                    # Only the entities within range of the target (except target) in the current timestamp.
+                    with profiler.stage("index_query"):
+                        rows_found, distances_calculated = index.query(current_ts, sus_location, distance_from_target,
+                                                                       filter_stats)
+                    entity_ts_group = index.entities.iloc[rows_found]
+
+                    not_target = (entity_ts_group["id"] != entity_id_to_filter).to_numpy()
+                    entity_ids = entity_ts_group["id"].to_numpy()
+                    entity_points = entity_ts_group[["lat", "long", "height"]].to_numpy(dtype=float)
+                    rows_found = np.flatnonzero(not_target)
+                    distances_calculated = distances_calculated[not_target]
+
+                within_range = distances_calculated < distance_from_target
+
+                if not within_range.any(): continue
+
+                rows_found = rows_found[within_range]
+
+                ids_found.append(entity_ids[rows_found])
+                ts_found.append(np.repeat(current_ts, len(rows_found)))
+                distances_found.append(distances_calculated[within_range])
+                locations_found.append(entity_points[rows_found])
+                sus_locations_found.append(np.tile(sus_location, (len(rows_found), 1)))
+
+            with profiler.stage("build_result"):
+                if not ids_found:
+                    result = pd.DataFrame(columns=RangedEntitiesFinder.RESULT_COLUMNS)
+                else:
+                    result = RangedEntitiesFinder._build_result(np.concatenate(ids_found), np.concatenate(ts_found),
+                                                                np.concatenate(distances_found),
+                                                                np.concatenate(locations_found),
+                                                                np.concatenate(sus_locations_found))
+
+            if index is None:
+                result.attrs["filter_stats"] = filter_stats
+            else:
+                # The index only reports the pairs it evaluated, it has no pre-filter stages.
+                profiler.count("evaluated", filter_stats["evaluated"])
+
+        if "filter_stats" in result.attrs: profiler.count_all(result.attrs["filter_stats"])
+        profiler.count("hits", len(result))
+
+        if reporter is not None:
+            with profiler.stage("report"):
+                reporter.report(result)
+
+        if plot:
+            with profiler.stage("plot"):
+                # The target might have been dropped since a previous user input during runtime.
+                all_entities = total_df.to_dataframe() if isinstance(total_df, TrackStore) else total_df
+                RangedEntitiesFinder.update_figure(all_entities[all_entities["id"] != entity_id_to_filter], sus_df,
+                                                   hits=result)
+
+        return result
 
-        # Removing (dropping) the data about the target from total_df to make working with the data easier.
-        # The target might have been dropped since a previous user input during runtime.
-        non_target_entities = total_df[total_df["id"] != entity_id_to_filter]
+    @staticmethod
+    def _ts_to_numbers(timestamps: pd.Series) -> np.ndarray:
+        """
+        Converts timestamps to numbers that can be compared and interpolated.
 
-        # Grouping according to timestamps.
-        # Storing ID, lat, long, and height columns in the new grouped DataFrame.
-        # When reading data according to each timestamp, the mentioned columns (ID, lat, long, height) will
-        # have values as Pandas Series.
-        paths_of_ts = (non_target_entities.groupby(by="ts")[["id", "lat", "long", "height"]]).apply(pd.DataFrame)
+        :param timestamps: the timestamps (dates or numbers).
+        :return: nanoseconds since the epoch for dates, otherwise the timestamps as floats.
+        """
 
-        # Storing the coordinates (as points) as a Series of dictionary of tuples, stored in sus DataFrame.
-        path_points_sus = sus_df.groupby(by=["ts"])[["lat", "long", "height"]].apply(dict)
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            return timestamps.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
 
-        print("Format of coordinates: (latitude [deg], longitude [deg], height [km])\n")
+        return timestamps.to_numpy(dtype=np.float64)
 
-        # Iterating over the path of the target entity.
-        for current_ts in path_points_sus.keys():
-            if current_ts not in paths_of_ts.index: continue
+    @staticmethod
+    def locate_closest_entities_in_time_window(total_df: pd.DataFrame, sus_df: pd.DataFrame,
+                                               distance_from_target = 1000.0, time_tolerance = 0,
+                                               interpolate: bool = False) -> pd.DataFrame:
+        """
+        Locates the closest entities within a defined distance from the **sus**picious target,
+        without requiring the entities and the target to be recorded at exactly the same timestamps.
+        The distance is measured in km.
 
-            # The current group of entities (except target) in the current timestamp.
-            entity_ts_group = paths_of_ts.loc[current_ts]
-            # The current location of the target entity (sus).
-            # path_points_sus[current_ts].values() gives a series of values where the left number
-            # is an index and the right is the actual value that's needed.
-            # val.values[0] gets the needed value.
-            sus_location = tuple(float(val.values[0]) for val in path_points_sus[current_ts].values())
-            # Previous timestamp is used for checking if the current timestamp was printed already.
-            prev_ts = math.nan
+        Every entity sample is paired with the sample of the target nearest to it in time,
+        as long as they're at most time_tolerance apart. Optionally, the location of the target is interpolated
+        linearly between its samples before and after the time of the entity sample.
+        The pairing uses binary search over the sorted timestamps of the target (O(n log n)).
 
-            # Iterating over the group of entities which belong to the current timestamp.
-            for current_entity in entity_ts_group.iterrows():
-                # current_entity[1] gets the Pandas Series stored in the tuple of the current entity.
-                # Series structure: id, lat, long, height.
-                # [1:] slices the series to read the lat, long, and height coordinates.
-                entity_location = tuple(current_entity[1][1:])
+        :param total_df: DataFrame that contains data about the path of entities including a target.
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param distance_from_target: the maximum distance from the target allowed.
+        :param time_tolerance: the maximum time between an entity sample and the target sample it's paired with
+                               (a timedelta for dates, a number for numeric timestamps).
+        :param interpolate: True if the location of the target should be interpolated at the time of the entity sample.
+        :return: DataFrame with the columns of RESULT_COLUMNS, plus target_ts (the nearest sample of the target).
+                 None if the input is invalid.
+        """
 
-                distance_calculated = RangedEntitiesFinder._calc_distance(sus_location, entity_location)
+        result_columns = RangedEntitiesFinder.RESULT_COLUMNS + ["target_ts"]
 
-                print("Distance calculated:", distance_calculated, "[km]")
+        # Checking if distance is valid.
+        if distance_from_target <= 0:
+            print("Max distance can't be smaller or equal to 0!")
+            return None
+
+        non_target_entities = total_df[~total_df["id"].isin(sus_df["id"])]
+
+        # The path of the target, sorted by time (one sample per timestamp).
+        sus_path = sus_df.drop_duplicates(subset="ts").sort_values(by="ts", kind="stable")
+        sus_times = RangedEntitiesFinder._ts_to_numbers(sus_path["ts"])
+        sus_points = sus_path[["lat", "long", "height"]].to_numpy(dtype=float)
+
+        if pd.api.types.is_datetime64_any_dtype(sus_path["ts"]):
+            time_tolerance = float(pd.Timedelta(time_tolerance).value)
+
+        entity_times = RangedEntitiesFinder._ts_to_numbers(non_target_entities["ts"])
+
+        if len(sus_times) == 0 or len(entity_times) == 0: return pd.DataFrame(columns=result_columns)
+
+        # The samples of the target before and after each entity sample.
+        after_idx = np.searchsorted(sus_times, entity_times, side="left")
+        before_idx = np.clip(after_idx - 1, 0, len(sus_times) - 1)
+        after_idx = np.clip(after_idx, 0, len(sus_times) - 1)
+
+        before_gap = np.abs(entity_times - sus_times[before_idx])
+        after_gap = np.abs(sus_times[after_idx] - entity_times)
+        nearest_idx = np.where(after_gap < before_gap, after_idx, before_idx)
+
+        paired = np.minimum(before_gap, after_gap) <= time_tolerance
+
+        entity_points = non_target_entities[["lat", "long", "height"]].to_numpy(dtype=float)[paired]
+        before_idx, after_idx, nearest_idx = before_idx[paired], after_idx[paired], nearest_idx[paired]
+        entity_times = entity_times[paired]
+
+        if interpolate:
+            # The fraction of the way from the sample before to the sample after (0 when they're the same sample).
+            time_span = sus_times[after_idx] - sus_times[before_idx]
+            fraction = np.divide(entity_times - sus_times[before_idx], time_span,
+                                 out=np.zeros_like(time_span), where=time_span > 0)
+
+            target_points = DistanceEngine.interpolate_points(sus_points[before_idx], sus_points[after_idx],
+                                                              np.clip(fraction, 0, 1))
+        else:
+            target_points = sus_points[nearest_idx]
+
+        distances = DistanceEngine.calc_distances(target_points, entity_points)
+        within_range = distances < distance_from_target
+
+        result = RangedEntitiesFinder._build_result(
+            non_target_entities["id"].to_numpy()[paired][within_range],
+            non_target_entities["ts"].to_numpy()[paired][within_range],
+            distances[within_range], entity_points[within_range], target_points[within_range])
+        result["target_ts"] = sus_path["ts"].to_numpy()[nearest_idx[within_range]]
 
-                if distance_calculated >= distance_from_target: continue
+        return result.sort_values(by="ts", kind="stable").reset_index(drop=True)
 
-                if prev_ts != current_ts:
-                    print(f"---------- Timestamp {current_ts} ----------")
-                    prev_ts = current_ts
+    @staticmethod
+    def locate_entities_near_targets(total_df: pd.DataFrame, targets, distance_from_target = 1000.0,
+                                     index: SpatialIndex = None) -> pd.DataFrame:
+        """
+        Locates the entities within a defined distance from any of several **sus**picious targets at once.
+        The distance is measured in km.
+
+        The data is grouped by timestamp once, and at every timestamp all the targets are searched
+        together in the spatial index of that timestamp (instead of rescanning total_df per target).
+        Other targets count as entities as well, only a target paired with itself is left out.
 
-                # Rounding the coordinate values of the entities (both that are close to target and of target itself).
-                # Used purely for printing.
-                entities_location_rounded = RangedEntitiesFinder._round_coordinates(entity_location)
-                sus_location_rounded = RangedEntitiesFinder._round_coordinates(sus_location)
+        :param total_df: DataFrame that contains data about the path of entities including the targets.
+        :param targets: the ids of the targets, or a DataFrame (such as sus_df) that contains the paths of the targets.
+        :param distance_from_target: the maximum distance from a target allowed.
+        :param index: an optional SpatialIndex built from total_df, built here if not given.
+        :return: DataFrame with the columns target_id, entity_id, ts and distance, one row per proximity found.
+                 None if the input is invalid.
+        """
+
+        result_columns = ["target_id", "entity_id", "ts", "distance"]
 
-                print(f"Entity(ies):", end=' ')
+        # Checking if distance is valid.
+        if distance_from_target <= 0:
+            print("Max distance can't be smaller or equal to 0!")
+            return None
 
-                # Note2self: asterisk before an iterable object (such as a list)
-                #            in a print statement will print all the values in an object
-                #            in a readable way. Example: [1, 2, 3] with sep=", "
-                #            will be printed as: 1, 2, 3    
-                # Function .values() created a Pandas Series which is turned into a list.
-                # The [0] is used to read only the Ids of the entities, without the indexes of the series.
-                print(*list(current_entity), sep=", ", end=' ')
-                print(f"is/are close to target ({round(distance_calculated, 3)} km)!\n" 
-                    + f"Entity(ies) coordinates:\t{entities_location_rounded}\nTarget coordinates:\t\t{sus_location_rounded}\n")
+        # The paths of the targets are taken from total_df when only their ids are given.
+        if isinstance(targets, pd.DataFrame):
+            targets_paths = targets
+        else:
+            targets_paths = total_df[total_df["id"].isin(list(targets))]
 
-        RangedEntitiesFinder.update_figure(non_target_entities, sus_df)
+        if index is None: index = SpatialIndex(total_df)
 
-        return True
+        targets_found = []
+        rows_found = []
+        ts_found = []
+        distances_found = []
+
+        # Iterating over the timestamps of the targets, searching for all the targets of a timestamp in one pass.
+        for current_ts, targets_ts_group in targets_paths.groupby(by="ts"):
+            locations = targets_ts_group[["lat", "long", "height"]].to_numpy(dtype=float)
+            location_positions, rows, distances = index.query_many(current_ts, locations, distance_from_target)
+
+            targets_found.append(targets_ts_group["id"].to_numpy()[location_positions])
+            rows_found.append(rows)
+            ts_found.append(np.repeat(current_ts, len(rows)))
+            distances_found.append(distances)
+
+        if not rows_found: return pd.DataFrame(columns=result_columns)
+
+        found = pd.DataFrame({
+            "target_id": np.concatenate(targets_found),
+            "entity_id": index.entities["id"].to_numpy()[np.concatenate(rows_found)],
+            "ts": np.concatenate(ts_found),
+            "distance": np.concatenate(distances_found)
+        })
+
+        # Leaving out each target paired with itself.
+        found = found[found["target_id"] != found["entity_id"]]
+
+        return found.sort_values(by=["target_id", "ts", "distance"], kind="stable").reset_index(drop=True)
 
     @staticmethod
-    def update_figure(all_entities: pd.DataFrame, sus_entity: pd.DataFrame):
+    def update_figure(all_entities: pd.DataFrame, sus_entity: pd.DataFrame, save_path: str = None,
+                      hits: pd.DataFrame = None, max_points_per_entity: int = 500):
         """
         Used for displaying the paths of entities in 3D.
         Uses X, Y, Z axis instead of showing the paths around Earth
         to make things simpler.
 
+        Every entity is drawn as a decimated polyline and only the hits are highlighted (see TrajectoryRenderer).
+
         Note: Latitude in this code is considered to be X axis.
               Longitude in this code is considered to be Y axis.
               Height in this code is considered to be Z axis.
-        :param all_entities:
-        :param sus_entity:
+        :param all_entities: DataFrame that contains the paths of the entities (except target).
+        :param sus_entity: DataFrame that contains the path of the target.
+        :param save_path: if given, the figure is rendered to this file (.png or .html) instead of being displayed.
+        :param hits: the entities found in range (the result of the finder), highlighted if given.
+        :param max_points_per_entity: the maximum amount of points drawn per entity.
         :return:
         """
 
-        # Non target coordinates.
-        lat_values = all_entities["lat"]
-        long_values = all_entities["long"]
-        height_values = all_entities["height"]
+        if save_path is not None:
+            TrajectoryRenderer.render(all_entities, sus_entity, save_path, hits, max_points_per_entity)
+            return
 
-        # Target coordinates.
-        sus_lats = sus_entity["lat"]
-        sus_longs = sus_entity["long"]
-        sus_heights = sus_entity["height"]
+        # Imported here so that using the finder without plotting doesn't pay for importing matplotlib.
+        import matplotlib.pyplot as plt
 
-        plt.xlabel("Latitude")
-        plt.ylabel("Longitude")
+        # A new figure is created every time, as a figure whose window was closed can't be shown again.
+        display_fig = plt.figure()
+        plotter = display_fig.add_subplot(111, projection="3d")
 
-        # Plotting data of entities which aren't the target.
-        RangedEntitiesFinder.plotter.scatter(lat_values, long_values, height_values)
-        # Plotting data of the target entity.
-        RangedEntitiesFinder.plotter.scatter(sus_lats, sus_longs, sus_heights)
+        TrajectoryRenderer.draw(plotter, all_entities, sus_entity, hits, max_points_per_entity)
 
-        # todo: find out why show doesn't work a second time after closing the figure window.
-        plt.show()
\ No newline at end of file
+        plt.show()
+        plt.close(display_fig)
@@ -0,0 +1,162 @@
+from abc import ABC, abstractmethod
+from urllib.parse import urlsplit
+import pandas as pd
+import asyncio
+import os
+
+class ResultSink(ABC):
+    """
+    A destination for the hits found by AsyncPipeline.
+
+    The pipeline calls open() once, write() with the hits of every chunk (in order), and close() once at the end.
+    write() waits until the destination accepts the hits, so a slow destination slows the pipeline down
+    (backpressure) instead of letting hits pile up in memory.
+    """
+
+    async def open(self):
+        pass
+
+    @abstractmethod
+    async def write(self, hits: pd.DataFrame):
+        """
+        Writes the hits of a single chunk to the destination.
+
+        :param hits: DataFrame of the hits of the chunk.
+        """
+
+    async def close(self):
+        pass
+
+    @staticmethod
+    def to_json_lines(hits: pd.DataFrame) -> bytes:
+        """
+        :param hits: DataFrame of hits.
+        :return: the hits as JSON lines (one object per hit), encoded as UTF-8.
+        """
+
+        return hits.to_json(orient="records", lines=True, date_format="iso").encode("utf-8")
+
+
+class FileSink(ResultSink):
+    """
+    Appends the hits to a file (.csv, or JSON lines for .json/.jsonl). The file is written on a background thread,
+    so the event loop keeps reading and computing in the meantime.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: the path of the file, replaced if it exists.
+        """
+
+        self.path = path
+        self._json = os.path.splitext(path)[1].lower() in (".json", ".jsonl")
+        self._header_written = False
+
+    def _truncate(self):
+        # Starting from an empty file, as the hits are appended.
+        with open(self.path, "w"): pass
+
+        self._header_written = False
+
+    async def open(self):
+        await asyncio.to_thread(self._truncate)
+
+    def _append(self, hits: pd.DataFrame):
+        if self._json:
+            with open(self.path, "ab") as sink_file:
+                sink_file.write(ResultSink.to_json_lines(hits))
+        else:
+            hits.to_csv(self.path, mode="a", header=not self._header_written, index=False)
+            self._header_written = True
+
+    async def write(self, hits: pd.DataFrame):
+        await asyncio.to_thread(self._append, hits)
+
+
+class SocketSink(ResultSink):
+    """
+    Sends the hits as JSON lines over a TCP connection (for example to a local stand-in of an alerting service).
+    """
+
+    def __init__(self, host: str, port: int):
+        """
+        :param host: the host to connect to.
+        :param port: the port to connect to.
+        """
+
+        self.host = host
+        self.port = port
+        self._writer = None
+
+    async def open(self):
+        _, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def write(self, hits: pd.DataFrame):
+        self._writer.write(ResultSink.to_json_lines(hits))
+        # Waiting for the data to be sent when the receiver is slower than the pipeline.
+        await self._writer.drain()
+
+    async def close(self):
+        if self._writer is None: return
+
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._writer = None
+
+
+class HttpSink(ResultSink):
+    """
+    POSTs the hits of every chunk as JSON lines to an HTTP endpoint (plain http only, one connection per request).
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        :param url: the URL of the endpoint (http://host:port/path).
+        :param timeout: the maximum amount of seconds a single request may take.
+        """
+
+        split_url = urlsplit(url)
+
+        if split_url.scheme != "http":
+            raise ValueError(f"Unsupported URL scheme: '{split_url.scheme}' (expected http).")
+
+        self.url = url
+        self.timeout = timeout
+        self._host = split_url.hostname
+        self._port = split_url.port or 80
+        self._path = (split_url.path or "/") + (f"?{split_url.query}" if split_url.query else "")
+
+    async def _post(self, body: bytes) -> int:
+        """
+        :param body: the body of the request.
+        :return: the status code of the response.
+        """
+
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+
+        try:
+            writer.write((f"POST {self._path} HTTP/1.1\r\n"
+                          f"Host: {self._host}:{self._port}\r\n"
+                          "Content-Type: application/x-ndjson\r\n"
+                          f"Content-Length: {len(body)}\r\n"
+                          "Connection: close\r\n\r\n").encode("ascii") + body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            # The rest of the response isn't needed.
+            await reader.read()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+        status_parts = status_line.split()
+
+        if len(status_parts) < 2 or not status_parts[1].isdigit():
+            raise ConnectionError(f"Invalid response from {self.url}: {status_line!r}")
+
+        return int(status_parts[1])
+
+    async def write(self, hits: pd.DataFrame):
+        status = await asyncio.wait_for(self._post(ResultSink.to_json_lines(hits)), self.timeout)
+
+        if status >= 400: raise ConnectionError(f"{self.url} responded with status {status}.")
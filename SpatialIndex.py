@@ -0,0 +1,136 @@
+from DistanceEngine import DistanceEngine
+from scipy.spatial import cKDTree
+import numpy as np
+import pandas as pd
+
+class SpatialIndex:
+    """
+    A reusable spatio-temporal index over the paths of entities.
+
+    The index is built once from a DataFrame of paths (columns: id, ts, lat, long, height).
+    For every timestamp a KD-tree is built over the 3D ECEF coordinates of the entities recorded in it,
+    so a range query only visits the entities that are near the queried location instead of all of them.
+    """
+
+    def __init__(self, total_df: pd.DataFrame):
+        """
+        Builds the index.
+
+        :param total_df: DataFrame that contains data about the path of entities.
+        """
+
+        # Keeping a copy of the indexed data with a simple running index,
+        # the trees store positions in this DataFrame.
+        self.entities = total_df[["id", "ts", "lat", "long", "height"]].reset_index(drop=True)
+
+        self._points = self.entities[["lat", "long", "height"]].to_numpy(dtype=float)
+        self._max_height = float(self._points[:, 2].max()) if len(self._points) else 0.0
+
+        # Same validation as DistanceEngine.prefilter, so invalid points aren't silently never found.
+        if np.any(np.abs(self._points[:, 0]) > 90):
+            raise ValueError("Latitude must be in the [-90; 90] range.")
+
+        ecef_points = DistanceEngine.to_ecef(self._points)
+
+        # Mapping between each timestamp and its tree (and the rows the tree was built from).
+        self._trees = {}
+
+        for current_ts, rows in self.entities.groupby(by="ts").indices.items():
+            self._trees[current_ts] = (cKDTree(ecef_points[rows]), rows)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __contains__(self, ts) -> bool:
+        return ts in self._trees
+
+    def timestamps(self) -> list:
+        """
+        :return: the timestamps that have data in the index.
+        """
+
+        return list(self._trees.keys())
+
+    def query(self, ts, location: tuple, max_distance: float, filter_stats: dict = None) -> tuple:
+        """
+        Finds the entities that are closer than max_distance (in km) to a location at a specific timestamp.
+
+        :param ts: the timestamp to search in.
+        :param location: the location to search around (latitude, longitude, height).
+        :param max_distance: the maximum distance from the location.
+        :param filter_stats: an optional dictionary whose "evaluated" counter is increased (see query_many).
+        :return: a tuple of the rows (positions in self.entities) of the entities found and their distances.
+        """
+
+        _, rows, distances = self.query_many(ts, [location], max_distance, filter_stats)
+
+        return rows, distances
+
+    def query_many(self, ts, locations, max_distance: float, filter_stats: dict = None) -> tuple:
+        """
+        Finds the entities that are closer than max_distance (in km) to any of several locations
+        at a specific timestamp, in a single pass over the tree of the timestamp.
+
+        The KD-tree is searched with a slightly larger (ECEF) radius that is guaranteed to contain every
+        entity in range, then the exact distance is calculated only for those candidates.
+
+        :param ts: the timestamp to search in.
+        :param locations: the locations to search around, array-like of shape (m, 3).
+        :param max_distance: the maximum distance from the locations.
+        :param filter_stats: an optional dictionary whose "evaluated" counter is increased by the amount of
+                             candidates the exact distance was calculated for.
+        :return: a tuple of three arrays of the same length: for every pair found, the position of its location
+                 in locations, the row of the entity (position in self.entities), and the distance between them.
+        """
+
+        locations = np.asarray(locations, dtype=float).reshape(-1, 3)
+
+        if np.any(np.abs(locations[:, 0]) > 90):
+            raise ValueError("Latitude must be in the [-90; 90] range.")
+
+        if ts not in self._trees or max_distance <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0, dtype=float)
+
+        tree, rows = self._trees[ts]
+
+        search_radius = max_distance * DistanceEngine.max_chord_factor(max(self._max_height, locations[:, 2].max()))
+        candidates_per_location = tree.query_ball_point(DistanceEngine.to_ecef(locations), search_radius)
+
+        # Flattening the candidates of all the locations to one array of pairs.
+        candidates_amounts = [len(candidates) for candidates in candidates_per_location]
+        location_positions = np.repeat(np.arange(len(locations)), candidates_amounts)
+        candidates = rows[np.concatenate(candidates_per_location).astype(np.intp)]
+
+        distances = DistanceEngine.calc_distances(locations[location_positions], self._points[candidates])
+
+        if filter_stats is not None: filter_stats["evaluated"] = filter_stats.get("evaluated", 0) + len(candidates)
+
+        # Keeping the exact same condition the finder uses (entities at exactly max_distance are not in range).
+        within_range = distances < max_distance
+
+        return location_positions[within_range], candidates[within_range], distances[within_range]
+
+    def query_path(self, sus_df: pd.DataFrame, max_distance: float) -> pd.DataFrame:
+        """
+        Finds the entities that are closer than max_distance (in km) to the target at any point of its path.
+        The target itself (every id in sus_df) is left out of the results.
+
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param max_distance: the maximum distance from the target.
+        :return: DataFrame of the entities found (id, ts, lat, long, height) and their distance from the target.
+        """
+
+        found_rows = []
+        found_distances = []
+
+        for sus_point in sus_df[["ts", "lat", "long", "height"]].itertuples(index=False):
+            rows, distances = self.query(sus_point[0], tuple(float(val) for val in sus_point[1:]), max_distance)
+            found_rows.append(rows)
+            found_distances.append(distances)
+
+        found_rows = np.concatenate(found_rows) if found_rows else np.empty(0, dtype=np.intp)
+        found_distances = np.concatenate(found_distances) if found_distances else np.empty(0, dtype=float)
+
+        found = self.entities.iloc[found_rows].assign(distance=found_distances)
+
+        return found[~found["id"].isin(sus_df["id"])].reset_index(drop=True)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+class TrackStore:
+    """
+    Holds the paths of entities as contiguous NumPy arrays, sorted by timestamp and then by id.
+
+    The rows of every timestamp are adjacent, and their bounds are kept as CSR-style offsets
+    (the rows of the k-th timestamp are offsets[k]:offsets[k + 1]), so the entities of a timestamp are
+    a zero-copy slice of the arrays instead of a DataFrame built per timestamp by groupby.
+
+    The arrays:
+        ids: the id of every row.
+        points: the lat, long and height of every row (float64, array of shape (n, 3)).
+        timestamps: the distinct timestamps (in their original type), in ascending order.
+        ts_keys: the distinct timestamps as int64 (nanoseconds since the epoch for dates, the timestamps themselves
+                 for integers), searched by positions_of. None for timestamps of any other type.
+        offsets: the bounds of the rows of every timestamp, array of shape (len(timestamps) + 1,).
+    """
+
+    def __init__(self, total_df: pd.DataFrame):
+        """
+        :param total_df: DataFrame that contains data about the path of entities (id, ts, lat, long, height).
+        """
+
+        # A stable sort keeps the original order of the rows of an entity within a timestamp.
+        order = np.lexsort((total_df["id"].to_numpy(), total_df["ts"].to_numpy()))
+
+        ts_values = total_df["ts"].to_numpy()[order]
+        self.ids = total_df["id"].to_numpy()[order]
+        self.points = np.ascontiguousarray(total_df[["lat", "long", "height"]].to_numpy(dtype=np.float64)[order])
+
+        # The rows where a new timestamp starts.
+        starts = np.flatnonzero(ts_values[1:] != ts_values[:-1]) + 1 if len(ts_values) else np.empty(0, dtype=np.int64)
+
+        self.timestamps = ts_values[np.concatenate(([0], starts))] if len(ts_values) else ts_values
+        self.offsets = np.concatenate(([0], starts, [len(ts_values)])).astype(np.int64)
+        self.ts_keys = TrackStore._to_ts_keys(self.timestamps)
+
+        # Only timestamps that have no int64 keys are looked up with a hash index.
+        self._ts_index = pd.Index(self.timestamps) if self.ts_keys is None else None
+
+    @staticmethod
+    def _to_ts_keys(timestamps: np.ndarray) -> np.ndarray:
+        """
+        :param timestamps: timestamps (dates, integers or any other type).
+        :return: the timestamps as int64 (nanoseconds since the epoch for dates), None if they aren't dates or integers.
+        """
+
+        if pd.api.types.is_datetime64_any_dtype(timestamps.dtype):
+            return timestamps.astype("datetime64[ns]").view(np.int64)
+
+        if pd.api.types.is_integer_dtype(timestamps.dtype): return timestamps.astype(np.int64)
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def lat(self) -> np.ndarray:
+        return self.points[:, 0]
+
+    @property
+    def long(self) -> np.ndarray:
+        return self.points[:, 1]
+
+    @property
+    def height(self) -> np.ndarray:
+        return self.points[:, 2]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: the memory held by the arrays of the store, in bytes.
+        """
+
+        arrays = (self.ids, self.points, self.timestamps, self.offsets, self.ts_keys)
+
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def positions_of(self, timestamps) -> np.ndarray:
+        """
+        :param timestamps: timestamps to look for.
+        :return: the position of every timestamp in timestamps (-1 for timestamps that aren't in the store).
+        """
+
+        timestamps = np.asarray(timestamps)
+        keys = TrackStore._to_ts_keys(timestamps) if self.ts_keys is not None else None
+
+        # Binary search over the int64 keys, unless the timestamps are of another kind than the ones of the store.
+        if keys is None or (timestamps.dtype.kind == "M") != (self.timestamps.dtype.kind == "M"):
+            if self._ts_index is None: self._ts_index = pd.Index(self.timestamps)
+            return self._ts_index.get_indexer(timestamps)
+
+        positions = np.minimum(np.searchsorted(self.ts_keys, keys), max(len(self.ts_keys) - 1, 0))
+        found = self.ts_keys[positions] == keys if len(self.ts_keys) else np.zeros(len(keys), dtype=bool)
+
+        return np.where(found, positions, -1)
+
+    def rows_of(self, position: int) -> slice:
+        """
+        :param position: the position of a timestamp in timestamps.
+        :return: the rows of the timestamp.
+        """
+
+        return slice(self.offsets[position], self.offsets[position + 1])
+
+    def entities_of(self, position: int) -> tuple:
+        """
+        :param position: the position of a timestamp in timestamps.
+        :return: a tuple of the ids and the points of the entities of the timestamp (views, not copies).
+        """
+
+        rows = self.rows_of(position)
+
+        return self.ids[rows], self.points[rows]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        :return: the paths as a DataFrame (id, ts, lat, long, height), ordered by timestamp and id.
+        """
+
+        return pd.DataFrame({
+            "id": self.ids,
+            "ts": np.repeat(self.timestamps, np.diff(self.offsets)),
+            "lat": self.lat,
+            "long": self.long,
+            "height": self.height
+        })
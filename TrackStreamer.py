@@ -0,0 +1,119 @@
+from DistanceEngine import DistanceEngine
+from RangedEntitiesFinder import RangedEntitiesFinder
+import pandas as pd
+import os
+
+class TrackStreamer:
+    """
+    Streams track data that doesn't fit in memory from CSV or Parquet files in chunks,
+    and finds the entities close to a target chunk by chunk.
+
+    The track file is expected to be ordered by timestamp (ts) so the hits are emitted in timestamp order,
+    and the memory used at any moment is bounded by the size of a single chunk (plus the path of the target).
+    """
+
+    # Columns every track file must have.
+    TRACK_COLUMNS = ["id", "ts", "lat", "long", "height"]
+
+    @staticmethod
+    def read_chunks(track_path: str, chunk_size: int = 1_000_000, parse_ts: bool = False):
+        """
+        Reads a track file (.csv or .parquet) in chunks.
+
+        :param track_path: the path of the track file.
+        :param chunk_size: the maximum amount of rows per chunk.
+        :param parse_ts: True if the timestamps should be parsed as dates (useful for CSV files).
+        :return: a generator of DataFrames with the columns of TRACK_COLUMNS.
+        """
+
+        extension = os.path.splitext(track_path)[1].lower()
+
+        if extension == ".csv":
+            chunks = pd.read_csv(track_path, usecols=TrackStreamer.TRACK_COLUMNS,
+                                 converters={"id": str}, chunksize=chunk_size)
+        elif extension == ".parquet":
+            # Imported here as pyarrow is only needed for Parquet files.
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(track_path)
+            chunks = (batch.to_pandas() for batch in
+                      parquet_file.iter_batches(batch_size=chunk_size, columns=TrackStreamer.TRACK_COLUMNS))
+        else:
+            raise ValueError(f"Unsupported track file format: '{extension}' (expected .csv or .parquet).")
+
+        for chunk in chunks:
+            chunk["id"] = chunk["id"].astype(str)
+
+            if parse_ts: chunk["ts"] = pd.to_datetime(chunk["ts"])
+
+            yield chunk
+
+    @staticmethod
+    def read_target_path(track_path: str, target_id, chunk_size: int = 1_000_000, parse_ts: bool = False) -> pd.DataFrame:
+        """
+        Reads the path of a single entity (usually the target) from a track file, one chunk at a time.
+
+        :param track_path: the path of the track file.
+        :param target_id: the id of the entity to read.
+        :param chunk_size: the maximum amount of rows per chunk.
+        :param parse_ts: True if the timestamps should be parsed as dates (useful for CSV files).
+        :return: DataFrame that contains the path of the entity.
+        """
+
+        target_chunks = [chunk[chunk["id"] == str(target_id)]
+                         for chunk in TrackStreamer.read_chunks(track_path, chunk_size, parse_ts)]
+
+        if not target_chunks: return pd.DataFrame(columns=TrackStreamer.TRACK_COLUMNS)
+
+        return pd.concat(target_chunks).reset_index(drop=True)
+
+    @staticmethod
+    def locate_hits_in_chunk(chunk: pd.DataFrame, sus_df: pd.DataFrame, distance_from_target: float) -> pd.DataFrame:
+        """
+        Finds the entities of a single chunk that are close to the target.
+
+        :param chunk: DataFrame that contains a part of the paths of entities.
+        :param sus_df: DataFrame that contains data about the path of the target.
+        :param distance_from_target: the maximum distance from the target allowed (in km).
+        :return: DataFrame with the same columns as the result of RangedEntitiesFinder.locate_closest_entities_to_target.
+        """
+
+        target_path = sus_df[["ts", "lat", "long", "height"]].rename(
+            columns={"lat": "target_lat", "long": "target_long", "height": "target_height"})
+
+        # Joining the chunk with the location of the target at the same timestamps (the target itself is dropped).
+        pairs = chunk[~chunk["id"].isin(sus_df["id"].astype(str))].merge(target_path, on="ts", how="inner")
+
+        pairs["distance"] = DistanceEngine.calc_distances(
+            pairs[["target_lat", "target_long", "target_height"]].to_numpy(dtype=float),
+            pairs[["lat", "long", "height"]].to_numpy(dtype=float))
+
+        hits = pairs[pairs["distance"] < distance_from_target]
+
+        return hits[RangedEntitiesFinder.RESULT_COLUMNS].reset_index(drop=True)
+
+    @staticmethod
+    def locate_closest_entities_in_stream(track_path: str, sus_df: pd.DataFrame, distance_from_target = 1000.0,
+                                          chunk_size: int = 1_000_000, parse_ts: bool = False):
+        """
+        Locates the closest entities within a defined distance from the **sus**picious target,
+        reading the track file one chunk at a time and emitting the hits of every chunk as soon as they're found.
+        The distance is measured in km.
+
+        :param track_path: the path of the track file (.csv or .parquet), ordered by timestamp.
+        :param sus_df: DataFrame that contains data about the path of the target (see read_target_path).
+        :param distance_from_target: the maximum distance from the target allowed.
+        :param chunk_size: the maximum amount of rows per chunk.
+        :param parse_ts: True if the timestamps should be parsed as dates (useful for CSV files).
+        :return: a generator of DataFrames of the hits, one per chunk that has any.
+        """
+
+        # Checking if distance is valid.
+        if distance_from_target <= 0:
+            print("Max distance can't be smaller or equal to 0!")
+            return
+
+        for chunk in TrackStreamer.read_chunks(track_path, chunk_size, parse_ts):
+            hits = TrackStreamer.locate_hits_in_chunk(chunk, sus_df, distance_from_target)
+
+            if not hits.empty: yield hits
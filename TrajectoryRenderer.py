@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+import numpy as np
+import pandas as pd
+import base64
+import io
+import os
+
+class TrajectoryRenderer:
+    """
+    Renders the paths of entities in 3D in a way that scales to large results.
+
+    Every entity is drawn as a single polyline (all of them in one collection) instead of a point per sample,
+    each polyline is decimated to at most max_points_per_entity points (level of detail),
+    and only the entities found in range (the hits) are highlighted as points.
+
+    Rendering to a file uses matplotlib's object oriented API with the Agg canvas (no pyplot global state),
+    so it can run off the main thread (see render_async).
+
+    Note: like update_figure, latitude is the X axis, longitude is the Y axis and height is the Z axis.
+    """
+
+    # A single background thread is enough for rendering figures to files one after another.
+    _executor = None
+
+    @staticmethod
+    def decimate_paths(paths: pd.DataFrame, max_points_per_entity: int = 500) -> pd.DataFrame:
+        """
+        Keeps at most max_points_per_entity evenly spaced points of the path of every entity
+        (the first and the last points of every path are always kept).
+
+        :param paths: DataFrame that contains the paths of entities (id, ts, lat, long, height).
+        :param max_points_per_entity: the maximum amount of points kept per entity.
+        :return: the decimated paths, ordered by id and timestamp.
+        """
+
+        paths = paths.sort_values(by=["id", "ts"], kind="stable")
+
+        if max_points_per_entity is None or max_points_per_entity < 2: return paths
+
+        grouped = paths.groupby(by="id", sort=False)
+        position = grouped.cumcount().to_numpy()
+        path_length = grouped["ts"].transform("size").to_numpy()
+
+        # Every entity gets its own stride, so short paths are kept whole.
+        stride = np.maximum(1, np.ceil(path_length / max_points_per_entity).astype(np.int64))
+        keep = (position % stride == 0) | (position == path_length - 1)
+
+        return paths[keep]
+
+    @staticmethod
+    def _to_polylines(paths: pd.DataFrame) -> list:
+        """
+        Splits paths ordered by id to one array of points per entity.
+        A path that crosses the antimeridian is split there as well, so no line is drawn across the whole plot.
+
+        :param paths: DataFrame that contains the paths of entities, ordered by id.
+        :return: a list of arrays of shape (k, 3) (latitude, longitude, height).
+        """
+
+        points = paths[["lat", "long", "height"]].to_numpy(dtype=float)
+        ids = paths["id"].to_numpy()
+        boundaries = np.flatnonzero((ids[1:] != ids[:-1]) | (np.abs(np.diff(points[:, 1])) > 180)) + 1
+
+        return np.split(points, boundaries) if len(points) else []
+
+    @staticmethod
+    def draw(axes, all_entities: pd.DataFrame, sus_entity: pd.DataFrame, hits: pd.DataFrame = None,
+             max_points_per_entity: int = 500, max_hits: int = 10_000):
+        """
+        Draws the paths on 3D axes.
+
+        :param axes: matplotlib 3D axes.
+        :param all_entities: DataFrame that contains the paths of the entities (except target).
+        :param sus_entity: DataFrame that contains the path of the target.
+        :param hits: the entities found in range (the result of the finder), highlighted if given.
+        :param max_points_per_entity: the maximum amount of points drawn per entity.
+        :param max_hits: the maximum amount of hits highlighted.
+        """
+
+        # Imported here so that only rendering pays for importing matplotlib.
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+        entity_lines = TrajectoryRenderer._to_polylines(
+            TrajectoryRenderer.decimate_paths(all_entities, max_points_per_entity))
+        sus_lines = TrajectoryRenderer._to_polylines(
+            TrajectoryRenderer.decimate_paths(sus_entity, max_points_per_entity))
+
+        axes.add_collection3d(Line3DCollection(entity_lines, linewidths=0.5, colors="tab:blue", alpha=0.6))
+        axes.add_collection3d(Line3DCollection(sus_lines, linewidths=2.0, colors="tab:orange"))
+
+        if hits is not None and not hits.empty:
+            # Highlighting an evenly spaced subset when there are too many hits.
+            hits = hits.iloc[::int(np.ceil(len(hits) / max_hits))]
+            axes.scatter(hits["lat"], hits["long"], hits["height"], color="tab:red", s=8, depthshade=False)
+
+        # Collections don't update the limits of the axes by themselves.
+        all_points = np.concatenate(entity_lines + sus_lines) if entity_lines or sus_lines else np.zeros((1, 3))
+        axes.set_xlim(all_points[:, 0].min(), all_points[:, 0].max())
+        axes.set_ylim(all_points[:, 1].min(), all_points[:, 1].max())
+        axes.set_zlim(all_points[:, 2].min(), all_points[:, 2].max())
+
+        axes.set_xlabel("Latitude")
+        axes.set_ylabel("Longitude")
+        axes.set_zlabel("Height")
+
+    @staticmethod
+    def render(all_entities: pd.DataFrame, sus_entity: pd.DataFrame, save_path: str, hits: pd.DataFrame = None,
+               max_points_per_entity: int = 500, dpi: int = 100) -> str:
+        """
+        Renders the paths to a file, without a window (the format is chosen by the extension: .png or .html).
+        An .html file is a standalone page that contains the rendered image.
+
+        :param all_entities: DataFrame that contains the paths of the entities (except target).
+        :param sus_entity: DataFrame that contains the path of the target.
+        :param save_path: the path of the file.
+        :param hits: the entities found in range (the result of the finder), highlighted if given.
+        :param max_points_per_entity: the maximum amount of points drawn per entity.
+        :param dpi: the resolution of the image.
+        :return: the path of the file.
+        """
+
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = Figure(figsize=(10, 8))
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot(111, projection="3d")
+
+        TrajectoryRenderer.draw(axes, all_entities, sus_entity, hits, max_points_per_entity)
+
+        if os.path.splitext(save_path)[1].lower() == ".html":
+            image = io.BytesIO()
+            figure.savefig(image, format="png", dpi=dpi)
+            encoded_image = base64.b64encode(image.getvalue()).decode("ascii")
+
+            with open(save_path, "w") as html_file:
+                html_file.write("<!DOCTYPE html>\n<html><head><title>Entities paths</title></head><body>\n"
+                                f"<img alt=\"Entities paths\" src=\"data:image/png;base64,{encoded_image}\">\n"
+                                "</body></html>\n")
+        else:
+            figure.savefig(save_path, dpi=dpi)
+
+        return save_path
+
+    @staticmethod
+    def render_async(all_entities: pd.DataFrame, sus_entity: pd.DataFrame, save_path: str,
+                     hits: pd.DataFrame = None, max_points_per_entity: int = 500) -> Future:
+        """
+        Renders the paths to a file on a background thread (see render).
+
+        :return: a Future that resolves to the path of the file.
+        """
+
+        if TrajectoryRenderer._executor is None:
+            TrajectoryRenderer._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="renderer")
+
+        return TrajectoryRenderer._executor.submit(TrajectoryRenderer.render, all_entities, sus_entity,
+                                                   save_path, hits, max_points_per_entity)
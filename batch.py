@@ -0,0 +1,126 @@
+"""
+Headless, non-interactive batch mode.
+
+Reads the input tables, searches for the entities close to the targets for every given distance,
+and writes the results to a file. matplotlib is only imported when --plot is given.
+
+Examples:
+    python batch.py data/dataTables.xlsx --distances 100 500 --output hits.csv
+    python batch.py data/tables --targets 123 452 --distances 1000 --output hits.parquet
+    python batch.py tracks.parquet --targets 17 --distances 50 --output hits.csv    (streamed in chunks)
+"""
+
+from DataLoader import DataLoader
+from RangedEntitiesFinder import RangedEntitiesFinder
+from SpatialIndex import SpatialIndex
+from TrackStreamer import TrackStreamer
+import pandas as pd
+import argparse
+import os
+
+# Columns of the output file.
+OUTPUT_COLUMNS = ["distance_from_target", "target_id", "entity_id", "ts", "distance"]
+
+
+def write_results(results: pd.DataFrame, output_path: str):
+    """
+    Writes the results to a file, the format is chosen by the extension (.csv, .parquet or .json).
+
+    :param results: the results to write.
+    :param output_path: the path of the output file.
+    """
+
+    extension = os.path.splitext(output_path)[1].lower()
+
+    if extension == ".parquet":
+        results.to_parquet(output_path, index=False)
+    elif extension == ".json":
+        results.to_json(output_path, orient="records", lines=True, date_format="iso")
+    else:
+        results.to_csv(output_path, index=False)
+
+
+def locate_in_tables(data_path: str, target_ids: list, distances: list) -> pd.DataFrame:
+    """
+    Searches tables that fit in memory (an Excel file or a directory converted by DataLoader).
+
+    :param data_path: the path of the tables.
+    :param target_ids: the ids of the targets, the targets of the "sus" table if empty.
+    :param distances: the distances from the targets to search.
+    :return: the results of all the distances.
+    """
+
+    (total_df, sus_df) = DataLoader.load_tables(data_path)
+    targets = sus_df if not target_ids else target_ids
+
+    # The index is built once and shared by all the distances.
+    index = SpatialIndex(total_df)
+
+    results = [RangedEntitiesFinder.locate_entities_near_targets(total_df, targets, distance, index)
+               .assign(distance_from_target=distance) for distance in distances]
+
+    return pd.concat(results, ignore_index=True)
+
+
+def locate_in_stream(track_path: str, target_ids: list, distances: list, chunk_size: int) -> pd.DataFrame:
+    """
+    Searches a track file (.csv or .parquet) that doesn't fit in memory, one chunk at a time.
+
+    :param track_path: the path of the track file, ordered by timestamp.
+    :param target_ids: the ids of the targets.
+    :param distances: the distances from the targets to search.
+    :param chunk_size: the maximum amount of rows per chunk.
+    :return: the results of all the distances.
+    """
+
+    results = []
+
+    for target_id in target_ids:
+        sus_df = TrackStreamer.read_target_path(track_path, target_id, chunk_size)
+
+        # A single pass with the largest distance, the smaller distances are filtered out of its hits.
+        hits = list(TrackStreamer.locate_closest_entities_in_stream(track_path, sus_df, max(distances), chunk_size))
+        hits = pd.concat(hits, ignore_index=True) if hits else pd.DataFrame(columns=RangedEntitiesFinder.RESULT_COLUMNS)
+
+        for distance in distances:
+            within_range = hits[hits["distance"] < distance]
+            results.append(pd.DataFrame({"distance_from_target": distance, "target_id": str(target_id),
+                                         "entity_id": within_range["id"], "ts": within_range["ts"],
+                                         "distance": within_range["distance"]}))
+
+    return pd.concat(results, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finds the entities close to the targets and writes them to a file.")
+    parser.add_argument("data_path", help="an Excel file, a directory converted by DataLoader, "
+                                          "or a .csv/.parquet track file (streamed)")
+    parser.add_argument("--targets", nargs="*", default=[],
+                        help="the ids of the targets (the 'sus' table is used if not given)")
+    parser.add_argument("--distances", type=float, nargs="+", required=True, help="distances from the targets in km")
+    parser.add_argument("--output", required=True, help="the output file (.csv, .parquet or .json)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="rows per chunk when streaming")
+    parser.add_argument("--plot", help="save a figure of the paths to this file (only for tables)")
+    args = parser.parse_args()
+
+    if any(distance <= 0 for distance in args.distances):
+        parser.error("Max distance can't be smaller or equal to 0!")
+
+    streamed = os.path.splitext(args.data_path)[1].lower() in (".csv", ".parquet")
+
+    if streamed:
+        if not args.targets: parser.error("--targets is required when streaming a track file.")
+
+        results = locate_in_stream(args.data_path, args.targets, args.distances, args.chunk_size)
+    else:
+        results = locate_in_tables(args.data_path, args.targets, args.distances)
+
+    write_results(results[OUTPUT_COLUMNS], args.output)
+    print(f"{len(results)} result(s) written to {args.output}")
+
+    if args.plot and not streamed:
+        (total_df, sus_df) = DataLoader.load_tables(args.data_path)
+        targets_df = sus_df if not args.targets else total_df[total_df["id"].isin(args.targets)]
+
+        RangedEntitiesFinder.update_figure(total_df[~total_df["id"].isin(targets_df["id"])], targets_df,
+                                           save_path=args.plot)
@@ -1,17 +1,25 @@
 import pandas as pd
 from RangedEntitiesFinder import RangedEntitiesFinder as rEF
 from EntitiesGenerator import EntitiesGenerator
+from DistanceSweep import DistanceSweep
+from HitsReporter import HitsReporter
 import openpyxl
 
 if __name__ == "__main__":
     # Reading data from Excel into DataFrames.
-    #total_df = pd.read_excel(r"data/dataTables.xlsx", "total", converters={"id": str})
-    #sus_df = pd.read_excel(r"data/dataTables.xlsx", "sus", converters={"id": str})
+    # The same call reads a directory converted once with DataLoader.convert_excel (Parquet, Feather or .npy columns).
+    #from DataLoader import DataLoader
+    #(total_df, sus_df) = DataLoader.load_tables(r"data/dataTables.xlsx")
 
     num_entities = 5
     num_tracks = 10
 
     (total_df, sus_df) = EntitiesGenerator.generate_entities_paths(num_entities, num_tracks, False)
+    # Distances are calculated once per dataset (by the first query) and reused by every query.
+    index = None
+
+    # Printing the entities found, limited to the first ones of every query.
+    reporter = HitsReporter(max_hits=50)
 
     print("--- Enter max distance from target in km (or enter 's' to quit, or 'r' to generate new data) ---")
 
@@ -23,13 +31,24 @@ if __name__ == "__main__":
         if max_distance_from_target == 'r':
             print("Generating new data...")
             (total_df, sus_df) = EntitiesGenerator.generate_entities_paths(num_entities, num_tracks, False)
+            index = None
             continue
 
         try:
-            res = rEF.locate_closest_entities_to_target(total_df, sus_df, float(max_distance_from_target))
-            if not res:
-                print("Data invalid or no path crosses were found! Generating new data...")
+            distance_from_target = float(max_distance_from_target)
+
+            # Built only once the input is a valid number, and inside the try,
+            # as invalid data (such as a latitude out of range) raises ValueError.
+            if index is None: index = DistanceSweep(total_df, sus_df)
+
+            res = rEF.locate_closest_entities_to_target(total_df, sus_df, distance_from_target,
+                                                        index, reporter, plot=True)
+            if res is None:
+                print("Data invalid! Generating new data...")
                 (total_df, sus_df) = EntitiesGenerator.generate_entities_paths(num_entities, num_tracks, False)
+                index = None
+            elif res.empty:
+                print("No path crosses were found!")
 
         except ValueError as ex:
             print(ex)
\ No newline at end of file
@@ -0,0 +1,48 @@
+from CpaEngine import CpaEngine
+from DistanceEngine import DistanceEngine
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _paths(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["id", "ts", "lat", "long", "height"])
+
+
+def test_crossing_between_samples():
+    # The paths meet at 30% of the way between two samples 1 degree apart.
+    meeting_point = (10.3, 20.3)
+    entity_start = (11.0, 20.0)
+    entity_end = tuple(start + (meet - start) / 0.3 for start, meet in zip(entity_start, meeting_point))
+    total_df = _paths([(1, 0, 10.0, 20.0, 0.0), (1, 1, 11.0, 21.0, 0.0),
+                       (2, 0, *entity_start, 0.0), (2, 1, *entity_end, 0.0)])
+
+    result = CpaEngine.locate_closest_approaches(total_df, total_df[total_df["id"] == 1], 0.1)
+
+    assert list(result["id"]) == [2]
+    assert result["distance"].iloc[0] < 1e-3
+    assert result["cpa_ts"].iloc[0] == pytest.approx(0.3, abs=1e-5)
+    assert result["lat"].iloc[0] == pytest.approx(meeting_point[0], abs=1e-5)
+    assert result["long"].iloc[0] == pytest.approx(meeting_point[1], abs=1e-5)
+
+
+def test_coarse_segments_match_dense_search():
+    rng = np.random.default_rng(0)
+    amount = 200
+
+    def moved(points: np.ndarray) -> np.ndarray:
+        return points + np.column_stack((rng.uniform(-5, 5, amount), rng.uniform(-5, 5, amount), np.zeros(amount)))
+
+    target_start = np.column_stack((rng.uniform(-60, 60, amount), rng.uniform(-180, 180, amount), np.zeros(amount)))
+    target_end = moved(target_start)
+    entity_start = moved(target_start)
+    entity_end = moved(target_end)
+
+    _, distances = CpaEngine._calc_segments_cpa(entity_start, entity_end, target_start, target_end)
+
+    dense_distances = np.min([
+        DistanceEngine.calc_distances(DistanceEngine.interpolate_points(target_start, target_end, fraction),
+                                      DistanceEngine.interpolate_points(entity_start, entity_end, fraction))
+        for fraction in np.linspace(0, 1, 2001)], axis=0)
+
+    assert np.all(distances <= dense_distances + 1e-6)
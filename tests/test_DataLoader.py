@@ -0,0 +1,18 @@
+from DataLoader import DataLoader
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("data_format", DataLoader.FORMATS)
+def test_ids_load_as_strings_in_every_format(data_format, tmp_path):
+    if data_format != "npy": pytest.importorskip("pyarrow")
+
+    total_df = pd.DataFrame({"id": [1, 2, 1, 2], "ts": [0, 0, 1, 1],
+                             "lat": [0.0, 10.0, 0.0, 0.01], "long": [0.0, 10.0, 0.0, 0.01], "height": 0.0})
+    sus_df = total_df[total_df["id"] == 1]
+
+    DataLoader.save_tables(total_df, sus_df, str(tmp_path), data_format)
+    (loaded_total_df, loaded_sus_df) = DataLoader.load_tables(str(tmp_path))
+
+    assert list(loaded_total_df["id"]) == ["1", "2", "1", "2"]
+    assert list(loaded_sus_df["id"]) == ["1", "1"]
@@ -0,0 +1,47 @@
+from DistanceCache import DistanceCache
+from DistanceEngine import DistanceEngine
+import numpy as np
+import pytest
+
+
+def _random_pairs(amount: int) -> tuple:
+    rng = np.random.default_rng(0)
+    points_a = np.column_stack((rng.uniform(-60, 60, amount), rng.uniform(-180, 180, amount), rng.uniform(0, 10, amount)))
+
+    return points_a, points_a + rng.normal(0, 0.5, points_a.shape)
+
+
+@pytest.mark.parametrize("file_name", ["distances", "distances.npz"])
+def test_save_and_load_round_trip(file_name, tmp_path):
+    path = str(tmp_path / file_name)
+    points_a, points_b = _random_pairs(100)
+
+    cache = DistanceCache(path=path)
+    distances = cache.calc_distances(points_a, points_b)
+    cache.save()
+
+    loaded_cache = DistanceCache(path=path)
+
+    assert len(loaded_cache) == 100
+    assert np.array_equal(loaded_cache.calc_distances(points_a, points_b), distances)
+    assert loaded_cache.metrics()["hits"] == 100 and loaded_cache.metrics()["misses"] == 0
+
+
+def test_lookups_and_eviction():
+    points_a, points_b = _random_pairs(10)
+    cache = DistanceCache(max_entries=8)
+
+    assert np.array_equal(cache.calc_distances(points_a[:5], points_b[:5]),
+                          DistanceEngine.calc_distances(points_a[:5], points_b[:5]))
+
+    # The first two pairs become the most recently used, so the next ones evict pairs 2 and 3.
+    cache.calc_distances(points_a[:2], points_b[:2])
+    cache.calc_distances(points_a[5:10], points_b[5:10])
+
+    assert (cache.hits, cache.misses, cache.evictions, len(cache)) == (2, 10, 2, 8)
+
+    cache.calc_distances(points_a[:2], points_b[:2])
+    assert cache.hits == 4
+
+    cache.calc_distances(points_a[2:4], points_b[2:4])
+    assert cache.misses == 12
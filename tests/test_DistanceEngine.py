@@ -0,0 +1,81 @@
+from DistanceEngine import DistanceEngine
+from RangedEntitiesFinder import RangedEntitiesFinder
+import numpy as np
+import pytest
+
+# The largest difference (in km) allowed between DistanceEngine and the geopy based _calc_distance.
+MAX_ABS_ERROR = 8e-8
+
+
+def _reference_distances(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+    return np.array([RangedEntitiesFinder._calc_distance(tuple(point_a), tuple(point_b))
+                     for point_a, point_b in zip(points_a.tolist(), points_b.tolist())])
+
+
+def _random_points(rng: np.random.Generator, amount: int) -> np.ndarray:
+    return np.column_stack((rng.uniform(-90, 90, amount), rng.uniform(-180, 180, amount), rng.uniform(0, 500, amount)))
+
+
+def _assert_matches_reference(points_a: np.ndarray, points_b: np.ndarray):
+    distances = DistanceEngine.calc_distances(points_a, points_b)
+
+    assert np.max(np.abs(distances - _reference_distances(points_a, points_b))) < MAX_ABS_ERROR
+
+
+def test_random_pairs():
+    rng = np.random.default_rng(0)
+
+    _assert_matches_reference(_random_points(rng, 2000), _random_points(rng, 2000))
+
+
+def test_close_pairs():
+    rng = np.random.default_rng(1)
+    points_a = _random_points(rng, 1000)
+    points_a[:, 0] = np.clip(points_a[:, 0], -89, 89)
+    points_b = points_a + rng.normal(0, 0.01, points_a.shape)
+
+    _assert_matches_reference(points_a, points_b)
+
+
+def test_coincident_pairs():
+    rng = np.random.default_rng(2)
+    points = _random_points(rng, 200)
+
+    assert np.all(DistanceEngine.calc_distances(points, points.copy()) == 0)
+
+    # Same horizontal location at different heights.
+    raised = points.copy()
+    raised[:, 2] += 10
+    _assert_matches_reference(points, raised)
+
+
+def test_equatorial_pairs():
+    rng = np.random.default_rng(3)
+    amount = 500
+    points_a = np.column_stack((np.zeros(amount), rng.uniform(-180, 180, amount), np.zeros(amount)))
+    points_b = np.column_stack((np.zeros(amount), rng.uniform(-180, 180, amount), np.zeros(amount)))
+
+    _assert_matches_reference(points_a, points_b)
+
+
+@pytest.mark.parametrize("point_b", [(0.0, 180.0, 0.0), (0.0, 179.5, 0.0), (0.5, 179.7, 0.0),
+                                     (-30.0, -150.0, 0.0), (-29.9, -150.1, 100.0)])
+def test_near_antipodal_pairs(point_b):
+    point_a = (0.0, 0.0, 0.0) if point_b[0] >= 0 else (30.0, 30.0, 0.0)
+
+    _assert_matches_reference(np.array([point_a]), np.array([point_b]))
+
+
+def test_single_point_against_many():
+    rng = np.random.default_rng(4)
+    points = _random_points(rng, 300)
+    target = points[0]
+
+    _assert_matches_reference(np.tile(target, (len(points), 1)), points)
+    assert np.array_equal(DistanceEngine.calc_distances(target, points),
+                          DistanceEngine.calc_distances(np.tile(target, (len(points), 1)), points))
+
+
+def test_latitude_out_of_range():
+    with pytest.raises(ValueError):
+        DistanceEngine.calc_distances((91.0, 0.0, 0.0), (0.0, 0.0, 0.0))
@@ -0,0 +1,76 @@
+from ProximityMonitor import ProximityMonitor
+import pandas as pd
+import pytest
+
+
+def _positions(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["id", "ts", "lat", "long", "height"])
+
+
+def test_alerts_on_entering_and_again_only_after_leaving():
+    alerts_seen = []
+    monitor = ProximityMonitor(1, 1, on_alert=alerts_seen.append)
+
+    assert list(monitor.update(_positions([(1, 1, 0.0, 0.0, 0.0), (2, 1, 0.0, 0.005, 0.0)]))["id"]) == [2]
+    assert monitor.in_range == {2}
+
+    # Still in range, no new alert.
+    assert monitor.update(_positions([(2, 2, 0.0, 0.006, 0.0)])).empty
+
+    # Leaving the range, then coming back.
+    assert monitor.update(_positions([(2, 3, 0.0, 1.0, 0.0)])).empty
+    assert monitor.in_range == set()
+    assert list(monitor.update(_positions([(2, 4, 0.0, 0.001, 0.0)]))["id"]) == [2]
+
+    assert len(alerts_seen) == 2
+
+
+def test_target_moving_towards_a_stationary_entity():
+    monitor = ProximityMonitor(1, 1)
+
+    assert monitor.update(_positions([(1, 1, 0.0, 0.0, 0.0), (3, 1, 0.0, 2.0, 0.0)])).empty
+
+    alerts = monitor.update(_positions([(1, 5, 0.0, 2.001, 0.0)]))
+
+    assert list(alerts["id"]) == [3]
+    assert alerts["target_long"].iloc[0] == pytest.approx(2.001)
+
+
+def test_out_of_order_updates_are_ignored():
+    monitor = ProximityMonitor(1, 1)
+    monitor.update(_positions([(1, 1, 0.0, 0.0, 0.0), (2, 3, 0.0, 1.0, 0.0)]))
+
+    # An older position of the entity (in range) and of the target (away) don't replace the newer ones.
+    assert monitor.update(_positions([(2, 2, 0.0, 0.001, 0.0)])).empty
+    assert monitor.update(_positions([(1, 0, 0.0, 1.0, 0.0)])).empty
+    assert monitor.in_range == set()
+
+
+def test_max_entities_drops_the_least_recently_updated():
+    monitor = ProximityMonitor(1, 1, max_entities=2)
+    monitor.update(_positions([(2, 1, 0.0, 0.5, 0.0), (3, 1, 0.0, 0.6, 0.0)]))
+    monitor.update(_positions([(2, 2, 0.0, 0.5, 0.0)]))
+    monitor.update(_positions([(4, 3, 0.0, 0.7, 0.0)]))
+
+    assert len(monitor) == 2
+
+    # Entity 3 was dropped, so the target only finds the entities that are still kept.
+    alerts = monitor.update(_positions([(1, 4, 0.0, 0.6, 0.0)]))
+
+    assert alerts.empty
+    assert list(monitor.update(_positions([(1, 5, 0.0, 0.7, 0.0)]))["id"]) == [4]
+
+
+def test_max_age_drops_entities_that_stopped_updating():
+    monitor = ProximityMonitor(1, 1, max_age=5)
+    monitor.update(_positions([(2, 0, 0.0, 0.001, 0.0), (3, 0, 0.0, 0.002, 0.0)]))
+    monitor.update(_positions([(3, 10, 0.0, 0.002, 0.0)]))
+
+    assert len(monitor) == 1
+
+    assert list(monitor.update(_positions([(1, 10, 0.0, 0.0, 0.0)]))["id"]) == [3]
+
+
+def test_invalid_distance():
+    with pytest.raises(ValueError):
+        ProximityMonitor(1, 0)
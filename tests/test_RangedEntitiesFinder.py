@@ -0,0 +1,106 @@
+from RangedEntitiesFinder import RangedEntitiesFinder
+from SpatialIndex import SpatialIndex
+from DistanceSweep import DistanceSweep
+from Profiler import Profiler
+from CpaEngine import CpaEngine
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_single_entity_out_of_range_in_timestamp(workers):
+    # At ts 0 the only other entity is pruned by the pre-filter, at ts 1 it's in range.
+    total_df = pd.DataFrame({"id": [1, 2, 1, 2], "ts": [0, 0, 1, 1],
+                             "lat": [0, 10, 0, 0.01], "long": [0, 10, 0, 0.01], "height": 0})
+
+    result = RangedEntitiesFinder.locate_closest_entities_to_target(total_df, total_df[total_df["id"] == 1], 5,
+                                                                    workers=workers)
+
+    assert list(result["id"]) == [2]
+    assert list(result["ts"]) == [1]
+    assert result["distance"].iloc[0] == pytest.approx(1.569, abs=1e-3)
+
+
+def test_no_hits_is_empty_and_invalid_input_is_none():
+    total_df = pd.DataFrame({"id": [1, 2], "ts": [0, 0], "lat": [0, 10], "long": [0, 10], "height": 0})
+    sus_df = total_df[total_df["id"] == 1]
+
+    result = RangedEntitiesFinder.locate_closest_entities_to_target(total_df, sus_df, 5)
+
+    assert result is not None and result.empty
+    assert RangedEntitiesFinder.locate_closest_entities_to_target(total_df, sus_df, 0) is None
+
+
+@pytest.mark.parametrize("index_type", [SpatialIndex, DistanceSweep])
+def test_profiler_counters_with_index(index_type):
+    # The target is alone at ts 2, so that timestamp has nothing to search.
+    total_df = pd.DataFrame({"id": [1, 2, 1, 2, 1], "ts": [0, 0, 1, 1, 2],
+                             "lat": [0, 10, 0, 0.01, 0], "long": [0, 10, 0, 0.01, 0], "height": 0})
+    sus_df = total_df[total_df["id"] == 1]
+    index = SpatialIndex(total_df[total_df["ts"] < 2]) if index_type is SpatialIndex else DistanceSweep(total_df, sus_df)
+    profiler = Profiler()
+
+    result = RangedEntitiesFinder.locate_closest_entities_to_target(total_df, sus_df, 5, index, profiler=profiler)
+
+    assert len(result) == 1
+    assert profiler.counters["timestamps"] == 3
+    assert profiler.counters["timestamps_skipped"] == 1
+    assert profiler.counters["evaluated"] >= 1
+
+
+def test_every_finder_returns_none_for_invalid_distance():
+    total_df = pd.DataFrame({"id": [1, 2], "ts": [0, 0], "lat": [0, 10], "long": [0, 10], "height": 0})
+    sus_df = total_df[total_df["id"] == 1]
+
+    assert RangedEntitiesFinder.locate_closest_entities_in_time_window(total_df, sus_df, -1) is None
+    assert RangedEntitiesFinder.locate_entities_near_targets(total_df, [1], 0) is None
+    assert CpaEngine.locate_closest_approaches(total_df, sus_df, 0) is None
+
+
+def _paths(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["id", "ts", "lat", "long", "height"])
+
+
+def _locate(total_df: pd.DataFrame, distance_from_target: float, time_tolerance, interpolate: bool = False):
+    return RangedEntitiesFinder.locate_closest_entities_in_time_window(
+        total_df, total_df[total_df["id"] == 1], distance_from_target, time_tolerance, interpolate)
+
+
+def test_shifted_timestamps_pair_within_tolerance():
+    # The entity is recorded 2 after the target, about 0.56 km from the target's sample.
+    total_df = _paths([(1, 0, 0.0, 0.0, 0.0), (1, 10, 0.0, 1.0, 0.0), (1, 20, 0.0, 2.0, 0.0),
+                       (2, 2, 0.0, 0.005, 0.0)])
+
+    assert _locate(total_df, 1, 1).empty
+
+    result = _locate(total_df, 1, 3)
+
+    assert list(result["id"]) == [2]
+    assert list(result["target_ts"]) == [0]
+    assert result["distance"].iloc[0] == pytest.approx(0.557, abs=1e-3)
+
+
+def test_samples_outside_the_path_of_the_target_are_clipped_to_its_ends():
+    total_df = _paths([(1, 0, 0.0, 0.0, 0.0), (1, 10, 0.0, 1.0, 0.0),
+                       (2, -3, 0.0, -0.001, 0.0), (3, 15, 0.0, 1.001, 0.0)])
+
+    result = _locate(total_df, 1, 5, interpolate=True)
+
+    assert list(result["id"]) == [2, 3]
+    assert list(result["target_ts"]) == [0, 10]
+    assert list(result["target_long"]) == [0.0, 1.0]
+
+    assert list(_locate(total_df, 1, 4)["id"]) == [2]
+
+
+def test_interpolation_across_the_antimeridian():
+    # Halfway between the samples the target is on the antimeridian, where the entity is.
+    total_df = _paths([(1, 0, 0.0, 179.9, 0.0), (1, 10, 0.0, -179.9, 0.0), (2, 5, 0.0, -180.0, 0.0)])
+
+    assert _locate(total_df, 1, 5).empty
+
+    result = _locate(total_df, 1, 5, interpolate=True)
+
+    assert list(result["id"]) == [2]
+    assert result["distance"].iloc[0] == pytest.approx(0, abs=1e-6)
+    assert abs(result["target_long"].iloc[0]) == pytest.approx(180)
@@ -0,0 +1,10 @@
+from ResultSink import ResultSink
+import pytest
+
+
+def test_sink_without_write_fails_when_created():
+    class IncompleteSink(ResultSink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink()
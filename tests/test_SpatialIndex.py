@@ -0,0 +1,15 @@
+from SpatialIndex import SpatialIndex
+import pandas as pd
+import pytest
+
+
+def test_latitude_out_of_range_is_rejected():
+    total_df = pd.DataFrame({"id": [1, 2], "ts": [0, 0], "lat": [0.0, 178.0], "long": [0.0, 10.0], "height": 0.0})
+
+    with pytest.raises(ValueError):
+        SpatialIndex(total_df)
+
+    index = SpatialIndex(total_df[total_df["lat"] <= 90])
+
+    with pytest.raises(ValueError):
+        index.query(0, (161.4, 0.0, 0.0), 5)
@@ -0,0 +1,28 @@
+from TrackStore import TrackStore
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("timestamps", [
+    [3, 1, 2],
+    pd.to_datetime(["2024-01-03", "2024-01-01", "2024-01-02"]).to_numpy(),
+    [3.5, 1.5, 2.5]
+])
+def test_positions_of(timestamps):
+    total_df = pd.DataFrame({"id": ["a", "b", "a"], "ts": timestamps,
+                             "lat": [0.0, 1.0, 2.0], "long": 0.0, "height": 0.0})
+    store = TrackStore(total_df)
+    ordered = np.sort(np.asarray(timestamps))
+
+    assert list(store.positions_of(ordered)) == [0, 1, 2]
+    assert list(store.positions_of(ordered[::-1])) == [2, 1, 0]
+    assert store.entities_of(store.positions_of(ordered[:1])[0])[1][0, 0] == 1.0
+    assert (store.ts_keys is None) == (np.asarray(timestamps).dtype.kind == "f")
+
+
+def test_positions_of_missing_timestamps():
+    store = TrackStore(pd.DataFrame({"id": ["a", "a"], "ts": [10, 20], "lat": 0.0, "long": 0.0, "height": 0.0}))
+
+    assert list(store.positions_of(np.array([5, 10, 15, 20, 25]))) == [-1, 0, -1, 1, -1]
+    assert list(TrackStore(store.to_dataframe().iloc[:0]).positions_of(np.array([10]))) == [-1]